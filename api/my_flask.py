@@ -64,7 +64,7 @@ class MyFlask(Flask):
 
     def config_reader(self, file):
         parser = configparser.ConfigParser(interpolation=configparser.ExtendedInterpolation())
-        parser.read(file.name)
+        parser.read_file(file)
         mapping = {}
         for section in parser.sections():
             section_prefix = ''.join((x for x in section.split('-')[0] if x.isupper()))
@@ -18,19 +18,14 @@ __copyright__ = 'Copyright 2018 Cisco and its affiliates, Copyright The IETF Tru
 __license__ = 'Apache License, Version 2.0'
 __email__ = 'miroslav.kovac@pantheon.tech'
 
-import sys
 import time
+from urllib.parse import parse_qs, urlparse
 
 import requests
 from flask.globals import g, request
 from flask.helpers import make_response
 from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, core, generate_latest
 
-if sys.version_info >= (3, 4):
-    from urllib.parse import parse_qs, urlparse
-else:
-    from urlparse import parse_qs, urlparse
-
 
 def monitor(app):
     def before_request():
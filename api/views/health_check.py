@@ -17,19 +17,31 @@ __copyright__ = 'Copyright The IETF Trust 2020, All Rights Reserved'
 __license__ = 'Apache License, Version 2.0'
 __email__ = 'slavomir.mazur@pantheon.tech'
 
+import http.client
 import json
+import os
+import socket
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures import as_completed
+from functools import lru_cache, wraps
 from logging import Logger
+from typing import Any, Callable
 
+import orjson
 import requests
+from celery.exceptions import TimeoutError as CeleryTimeoutError
 from flask.blueprints import Blueprint
-from flask.helpers import make_response
-from flask.json import jsonify
+from flask.globals import request
+from flask.wrappers import Response
+from redis.exceptions import RedisError
+from requests.adapters import HTTPAdapter
 
 import utility.log as log
 from api.my_flask import app
 from jobs.celery import test_task
-from jobs.jobs_information import get_response
 from jobs.status_messages import StatusMessage
 from utility.staticVariables import json_headers
 
@@ -40,10 +52,73 @@ class HealthcheckBlueprint(Blueprint):
 
 bp = HealthcheckBlueprint('healthcheck', __name__)
 
+# (connect, read) timeouts in seconds for requests sent by the healthcheck endpoints
+HEALTHCHECK_TIMEOUT = (2.0, 5.0)
+
+# shared session so repeated probes reuse keep-alive connections instead of opening a new one each time,
+# /yangcatalog alone probes 12 distinct origins, so keep enough per-origin pools that none of them gets evicted
+session = requests.Session()
+adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=0)
+session.mount('http://', adapter)
+session.mount('https://', adapter)
+
+# seconds for which a healthcheck result is served from Redis, failures are kept for a shorter time
+HEALTHCHECK_CACHE_TTL = 15
+HEALTHCHECK_FAILURE_CACHE_TTL = 5
+
+# seconds to wait for the Celery workers to answer the ping sent over the broker's control channel
+CELERY_PING_TIMEOUT = 1.0
+# seconds to wait for the Celery test task to finish, its result is cached for CELERY_DEEP_CHECK_CACHE_TTL seconds
+CELERY_TEST_TASK_TIMEOUT = 15
+CELERY_DEEP_CHECK_CACHE_TTL = 60
+
+# blocking probes of the backing services run in the 'probes' pool, so that a stuck service can't hold the request
+# longer than PROBE_TIMEOUT seconds, the probe itself is left to finish in the background
+PROBE_TIMEOUT = 3.0
+# seconds to wait for all the probes of /health, the services which didn't respond by then are reported as down
+HEALTH_CHECK_ALL_TIMEOUT = 5.0
+# maximal number of workers of each of the pools returned by get_executor, the 'services' and 'yangcatalog' pools
+# run the fan-out of /health and /yangcatalog, they are separate from the probes pool since the probes they run
+# submit work to it
+EXECUTOR_MAX_WORKERS = {'probes': 8, 'services': 9, 'yangcatalog': 12}
+
+# static payloads of the requests sent by the yangre, yang-validator and yang-search probes
+YANGRE_PROBE_BODY = json.dumps({'pattern': '[0-9]*', 'content': '123456789', 'inverted': False, 'pattern_nb': '1'})
+YANG_VALIDATOR_PROBE_RFC = '7223'
+YANG_VALIDATOR_PROBE_BODY = json.dumps({'rfc': YANG_VALIDATOR_PROBE_RFC, 'latest': True})
+YANG_SEARCH_PROBE_MODULE = 'yang-catalog,2018-04-03,ietf'
+
+# (url, verify) pairs probed by /yangcatalog, certificates are not verified for the bare IP addresses
+YANGCATALOG_URLS = (
+    ('http://yangcatalog.org', True),
+    ('http://www.yangcatalog.org', True),
+    ('https://yangcatalog.org', True),
+    ('https://www.yangcatalog.org', True),
+    ('http://yangvalidator.com', True),
+    ('http://www.yangvalidator.com', True),
+    ('https://yangvalidator.com', True),
+    ('https://www.yangvalidator.com', True),
+    ('http://18.224.127.129', False),
+    ('https://18.224.127.129', False),
+    ('http://[2600:1f16:ba:200:a10d:3212:e763:e720]', False),
+    ('https://[2600:1f16:ba:200:a10d:3212:e763:e720]', False),
+)
+
+# ConfD's restconf response is shared between /confd and /confd-admin for this many seconds
+CONFD_RESTCONF_CACHE_TTL = 2.0
+confd_restconf_cache = {'timestamp': 0.0, 'response': None}
+
+# futures of the probes which are currently running, see single_flight
+inflight_probes: dict[str, Future] = {}
+inflight_probes_lock = threading.Lock()
+
+# parsed content of cronjob.json together with the modification time of the file it was read from
+cronjobs_cache = {'mtime': None, 'data': {}}
+
 
 @bp.record
 def init_logger(state):
-    bp.logger = log.get_logger('healthcheck', '{}/healthcheck.log'.format(state.app.config.d_logs))
+    bp.logger = log.get_logger('healthcheck', f'{state.app.config.d_logs}/healthcheck.log')
 
 
 @bp.before_request
@@ -53,85 +128,185 @@ def set_config():
     users = app_config.redis_users
 
 
+def json_response(body, status: int = 200) -> Response:
+    """Serialize the body with orjson, which is considerably faster than the standard json used by jsonify."""
+    return Response(orjson.dumps(body), status=status, mimetype='application/json')
+
+
+@lru_cache(maxsize=None)
+def get_executor(name: str) -> ThreadPoolExecutor:
+    """
+    Get the long-lived pool of the given name, which is created on its first use.
+    The app is preloaded before the gevent workers are forked and monkey patched, so a pool created at import
+    would be built from unpatched threading primitives and submitting to it would block the whole worker.
+    """
+    return ThreadPoolExecutor(max_workers=EXECUTOR_MAX_WORKERS[name], thread_name_prefix=f'healthcheck-{name}')
+
+
+def run_probe(probe: Callable, *args, timeout: float = PROBE_TIMEOUT) -> Any:
+    """Run the probe in the probes executor and wait at most timeout seconds for its result."""
+    return get_executor('probes').submit(probe, *args).result(timeout=timeout)
+
+
+def get_confd_restconf() -> requests.Response:
+    """Get the restconf root of ConfD, back-to-back calls within CONFD_RESTCONF_CACHE_TTL share one request."""
+    now = time.monotonic()
+    cached_response = confd_restconf_cache['response']
+    if cached_response is not None and now - confd_restconf_cache['timestamp'] < CONFD_RESTCONF_CACHE_TTL:
+        return cached_response
+    response = run_probe(app.confdService.get_restconf)
+    confd_restconf_cache.update(timestamp=now, response=response)
+    return response
+
+
+def single_flight(key: str):
+    """
+    Let only one call of the decorated probe run at a time, concurrent callers wait for its result
+    instead of sending the same requests to the probed service again.
+    """
+
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            with inflight_probes_lock:
+                future = inflight_probes.get(key)
+                is_leader = future is None
+                if is_leader:
+                    future = inflight_probes[key] = Future()
+            if is_leader:
+                try:
+                    future.set_result(f(*args, **kwargs))
+                except BaseException as err:
+                    future.set_exception(err)
+                finally:
+                    with inflight_probes_lock:
+                        del inflight_probes[key]
+            return future.result()
+
+        return wrapper
+
+    return decorator
+
+
+def cached_healthcheck(key: str, ttl: int = HEALTHCHECK_CACHE_TTL):
+    """Return the result of the decorated probe from Redis if it was computed less than ttl seconds ago."""
+
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            redis_key = f'healthcheck:{key}'
+            try:
+                cached_result = app_config.redis.get(redis_key)
+            except RedisError:
+                bp.logger.exception('Cannot get cached %s healthcheck from Redis', key)
+                cached_result = None
+            if cached_result:
+                return orjson.loads(cached_result)
+            result = f(*args, **kwargs)
+            expiration = ttl if result.get('status') == 'running' else min(ttl, HEALTHCHECK_FAILURE_CACHE_TTL)
+            try:
+                app_config.redis.setex(redis_key, expiration, orjson.dumps(result))
+            except RedisError:
+                bp.logger.exception('Cannot cache %s healthcheck in Redis', key)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
 @bp.route('/services-list', methods=['GET'])
 def get_services_list():
-    response_body = []
-    service_endpoints = [
-        'opensearch',
-        'confd-admin',
-        'redis-admin',
-        'yang-search-admin',
-        'yang-validator-admin',
-        'yangre-admin',
-        'nginx',
-        'yangcatalog',
-        'celery',
-    ]
-    service_names = [
-        'OpenSearch',
-        'ConfD',
-        'Redis',
-        'YANG search',
-        'YANG validator',
-        'YANGre',
-        'NGINX',
-        'YangCatalog',
-        'Celery',
-    ]
-    for name, endpoint in zip(service_names, service_endpoints):
-        pair = {'name': name, 'endpoint': endpoint}
-        response_body.append(pair)
-    return make_response(jsonify(response_body), 200)
+    return Response(services_list_body, status=200, mimetype='application/json')
 
 
-@bp.route('/opensearch', methods=['GET'])
-def health_check_opensearch():
+@bp.route('/health', methods=['GET'])
+def health_check_all():
+    """Run the probes of all the services from the services list in parallel and merge their results."""
+    flask_app = app._get_current_object()
+
+    def run_in_app_context(probe: Callable) -> dict:
+        with flask_app.app_context():
+            return probe()
+
+    futures = {
+        endpoint: get_executor('services').submit(run_in_app_context, probe)
+        for endpoint, (_, probe) in service_probes.items()
+    }
+    response_body = {}
+    deadline = time.monotonic() + HEALTH_CHECK_ALL_TIMEOUT
+    for endpoint, future in futures.items():
+        service_name = service_probes[endpoint][0]
+        try:
+            response_body[endpoint] = future.result(timeout=max(deadline - time.monotonic(), 0))
+        except FutureTimeoutError:
+            bp.logger.error('%s did not respond in %s seconds', service_name, HEALTH_CHECK_ALL_TIMEOUT)
+            response_body[endpoint] = error_response(service_name, 'timeout')
+        except Exception as err:
+            bp.logger.error('Cannot ping %s. Error: %s', service_name, err)
+            response_body[endpoint] = error_response(service_name, err)
+    return json_response(response_body)
+
+
+def ping_opensearch(running_response: Callable[[], dict]) -> dict:
+    """
+    Ping OpenSearch and build the response of a running OpenSearch by running_response,
+    or the response describing why OpenSearch is down.
+
+    Arguments:
+        :param running_response     (Callable[[], dict]) Builds the response once OpenSearch responded to ping
+        :return                     (dict) Health check response
+    """
     service_name = 'OpenSearch'
     try:
-        # try to ping OpenSearch
-        if app_config.opensearch_manager.ping():
-            # get health of cluster
-            health = app_config.opensearch_manager.cluster_health()
-            health_status = health.get('status')
-            # get list of indices
-            indices = app_config.opensearch_manager.get_indices()
-            if len(indices) > 0:
-                return make_response(
-                    jsonify(
-                        {
-                            'info': 'OpenSearch is running',
-                            'status': 'running',
-                            'message': 'Cluster status: {}'.format(health_status),
-                        },
-                    ),
-                    200,
-                )
-            else:
-                return make_response(
-                    jsonify(
-                        {
-                            'info': 'OpenSearch is running',
-                            'status': 'problem',
-                            'message': 'Cluster status: {} Number of indices: {}'.format(health_status, len(indices)),
-                        },
-                    ),
-                    200,
-                )
-        else:
-            bp.logger.info('Cannot connect to OpenSearch database')
-            return make_response(
-                jsonify(
-                    {
-                        'info': 'Not OK - OpenSearch is not running',
-                        'status': 'down',
-                        'error': 'Cannot ping OpenSearch',
-                    },
-                ),
-                200,
-            )
+        if run_probe(app_config.opensearch_manager.ping):
+            return running_response()
+        bp.logger.info('Cannot connect to OpenSearch database')
+        return {
+            'info': 'Not OK - OpenSearch is not running',
+            'status': 'down',
+            'error': 'Cannot ping OpenSearch',
+        }
+    except FutureTimeoutError:
+        bp.logger.error('OpenSearch did not respond in %s seconds', PROBE_TIMEOUT)
+        return error_response(service_name, 'timeout')
     except Exception as err:
-        bp.logger.error('Cannot connect to OpenSearch database. Error: {}'.format(err))
-        return make_response(jsonify(error_response(service_name, err)), 200)
+        bp.logger.error('Cannot connect to OpenSearch database. Error: %s', err)
+        return error_response(service_name, err)
+
+
+def opensearch_cluster_response() -> dict:
+    # get health of cluster
+    health = run_probe(app_config.opensearch_manager.cluster_health)
+    health_status = health.get('status')
+    # get number of indices
+    indices_count = run_probe(app_config.opensearch_manager.count_indices)
+    if indices_count > 0:
+        return status_response('OpenSearch is running', 'running', f'Cluster status: {health_status}')
+    return status_response(
+        'OpenSearch is running',
+        'problem',
+        f'Cluster status: {health_status} Number of indices: {indices_count}',
+    )
+
+
+@cached_healthcheck('opensearch')
+@single_flight('opensearch')
+def probe_opensearch() -> dict:
+    return ping_opensearch(opensearch_cluster_response)
+
+
+@bp.route('/opensearch', methods=['GET'])
+def health_check_opensearch():
+    return json_response(probe_opensearch())
+
+
+@bp.route('/opensearch/live', methods=['GET'])
+def health_check_opensearch_live():
+    """Cheap liveness check of OpenSearch, only pings it without checking the cluster health and indices."""
+    return json_response(
+        ping_opensearch(lambda: status_response('OpenSearch is running', 'running', 'OpenSearch responded to ping')),
+    )
 
 
 @bp.route('/confd', methods=['GET'])
@@ -140,7 +315,7 @@ def health_check_confd():
 
     try:
         # Check if ConfD is running
-        response = app.confdService.get_restconf()
+        response = get_confd_restconf()
 
         if response.status_code == 200:
             bp.logger.info('yang-catalog:catalog is running on ConfD')
@@ -150,15 +325,18 @@ def health_check_confd():
             response = {'error': 'Unable to ping yang-catalog:catalog'}
         return (response, 200)
 
+    except FutureTimeoutError:
+        bp.logger.error('%s did not respond in %s seconds', service_name, PROBE_TIMEOUT)
+        return json_response(error_response(service_name, 'timeout'))
     except Exception as err:
-        bp.logger.error('Cannot ping {}. Error: {}'.format(service_name, err))
-        return make_response(jsonify(error_response(service_name, err)), 200)
+        bp.logger.error('Cannot ping %s. Error: %s', service_name, err)
+        return json_response(error_response(service_name, err))
 
 
 @bp.route('/redis', methods=['GET'])
 def health_check_redis():
     try:
-        result = app_config.redis.ping()
+        result = run_probe(app_config.redis.ping)
         if result:
             response = {'info': 'Success'}
         else:
@@ -166,363 +344,383 @@ def health_check_redis():
             response = {'error': 'Unable to ping Redis'}
         return response, 200
 
+    except FutureTimeoutError:
+        bp.logger.error('Redis did not respond in %s seconds', PROBE_TIMEOUT)
+        error_message = {'error': 'Unable to ping Redis'}
+        return error_message, 200
     except Exception:
         bp.logger.exception('Cannot ping Redis')
         error_message = {'error': 'Unable to ping Redis'}
         return error_message, 200
 
 
-@bp.route('/nginx', methods=['GET'])
-def health_check_nginx():
+class UnixSocketHTTPConnection(http.client.HTTPConnection):
+    """HTTP connection sent over a Unix domain socket instead of TCP."""
+
+    def __init__(self, socket_path: str, timeout: float):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def get_nginx_health() -> tuple[int, bytes]:
+    """
+    Request the nginx-health location of NGINX. If NGINX exposes it on the Unix socket set as nginx-health-socket
+    in the Web-Section of the config, the socket is used to skip DNS lookup and TCP setup, otherwise the request
+    is sent to my-uri.
+
+    :return (tuple[int, bytes]) Status code and body of the response
+    """
+    socket_path = app_config.get('W-NGINX-HEALTH-SOCKET')
+    if socket_path and os.path.exists(socket_path):
+        connection = UnixSocketHTTPConnection(socket_path, timeout=HEALTHCHECK_TIMEOUT[1])
+        try:
+            connection.request('GET', '/nginx-health', headers=json_headers)
+            response = connection.getresponse()
+            return response.status, response.read()
+        finally:
+            connection.close()
+    response = session.get(f'{app_config.w_my_uri}/nginx-health', headers=json_headers, timeout=HEALTHCHECK_TIMEOUT)
+    return response.status_code, response.content
+
+
+def probe_nginx() -> dict:
     service_name = 'NGINX'
     try:
-        response = requests.get('{}/nginx-health'.format(app_config.w_my_uri), headers=json_headers)
-        bp.logger.info('NGINX responded with a code {}'.format(response.status_code))
-        response_message = response.json()['info']
-        if response.status_code == 200 and response_message == 'Success':
-            return make_response(
-                jsonify(
-                    {
-                        'info': 'NGINX is available',
-                        'status': 'running',
-                        'message': 'NGINX responded with a code {}'.format(response.status_code),
-                    },
-                ),
-                200,
+        status_code, content = get_nginx_health()
+        bp.logger.info('NGINX responded with a code %s', status_code)
+        response_message = orjson.loads(content)['info']
+        if status_code == 200 and response_message == 'Success':
+            return status_response(
+                'NGINX is available',
+                'running',
+                f'NGINX responded with a code {status_code}',
             )
         else:
-            return make_response(
-                jsonify(
-                    {
-                        'info': 'Not OK - NGINX is not available',
-                        'status': 'problem',
-                        'message': 'NGINX responded with a code {}'.format(response.status_code),
-                    },
-                ),
-                200,
+            return status_response(
+                'Not OK - NGINX is not available',
+                'problem',
+                f'NGINX responded with a code {status_code}',
             )
+    except (requests.exceptions.Timeout, socket.timeout) as err:
+        bp.logger.error('%s request timed out. Error: %s', service_name, err)
+        return error_response(service_name, 'timeout')
     except Exception as err:
-        bp.logger.error('Cannot ping {}. Error: {}'.format(service_name, err))
-        return make_response(jsonify(error_response(service_name, err)), 200)
+        bp.logger.error('Cannot ping %s. Error: %s', service_name, err)
+        return error_response(service_name, err)
 
 
-@bp.route('/yangre-admin', methods=['GET'])
-def health_check_yangre_admin():
+@bp.route('/nginx', methods=['GET'])
+def health_check_nginx():
+    return json_response(probe_nginx())
+
+
+@cached_healthcheck('yangre-admin')
+@single_flight('yangre-admin')
+def probe_yangre() -> dict:
     service_name = 'yangre'
-    yangre_prefix = '{}/yangre'.format(app_config.w_my_uri)
+    yangre_prefix = f'{app_config.w_my_uri}/yangre'
 
-    pattern = '[0-9]*'
-    content = '123456789'
-    body = json.dumps({'pattern': pattern, 'content': content, 'inverted': False, 'pattern_nb': '1'})
     try:
-        response = requests.post('{}/v1/yangre'.format(yangre_prefix), data=body, headers=json_headers)
-        bp.logger.info('yangre responded with a code {}'.format(response.status_code))
+        response = session.post(
+            f'{yangre_prefix}/v1/yangre',
+            data=YANGRE_PROBE_BODY,
+            headers=json_headers,
+            timeout=HEALTHCHECK_TIMEOUT,
+        )
+        bp.logger.info('yangre responded with a code %s', response.status_code)
         if response.status_code == 200:
-            response_message = response.json()
+            response_message = orjson.loads(response.content)
             if response_message['yangre_output'] == '':
-                return make_response(
-                    jsonify(
-                        {
-                            'info': '{} is available'.format(service_name),
-                            'status': 'running',
-                            'message': 'yangre successfully validated string',
-                        },
-                    ),
-                    200,
-                )
+                return available_response(service_name, 'running', 'yangre successfully validated string')
             else:
-                return make_response(
-                    jsonify(
-                        {
-                            'info': '{} is available'.format(service_name),
-                            'status': 'problem',
-                            'message': response_message['yangre_output'],
-                        },
-                    ),
-                    200,
-                )
+                return available_response(service_name, 'problem', response_message['yangre_output'])
         elif response.status_code == 400 or response.status_code == 404:
-            return make_response(
-                jsonify(
-                    {
-                        'info': '{} is available'.format(service_name),
-                        'status': 'problem',
-                        'message': 'yangre responded with a code {}'.format(response.status_code),
-                    },
-                ),
-                200,
-            )
+            return available_response(service_name, 'problem', f'yangre responded with a code {response.status_code}')
         else:
-            err = 'yangre responded with a code {}'.format(response.status_code)
-            return make_response(jsonify(error_response(service_name, err)), 200)
+            err = f'yangre responded with a code {response.status_code}'
+            return error_response(service_name, err)
+    except requests.exceptions.Timeout as err:
+        bp.logger.error('%s request timed out. Error: %s', service_name, err)
+        return error_response(service_name, 'timeout')
     except Exception as err:
-        bp.logger.error('Cannot ping {}. Error: {}'.format(service_name, err))
-        return make_response(jsonify(error_response(service_name, err)), 200)
+        bp.logger.error('Cannot ping %s. Error: %s', service_name, err)
+        return error_response(service_name, err)
 
 
-@bp.route('/yang-validator-admin', methods=['GET'])
-def health_check_yang_validator_admin():
+@bp.route('/yangre-admin', methods=['GET'])
+def health_check_yangre_admin():
+    return json_response(probe_yangre())
+
+
+@cached_healthcheck('yang-validator-admin')
+@single_flight('yang-validator-admin')
+def probe_yang_validator() -> dict:
     service_name = 'yang-validator'
-    yang_validator_prefix = '{}/yangvalidator'.format(app_config.w_my_uri)
+    yang_validator_prefix = f'{app_config.w_my_uri}/yangvalidator'
 
-    rfc_number = '7223'
-    body = json.dumps({'rfc': rfc_number, 'latest': True})
     try:
-        response = requests.post('{}/v2/rfc'.format(yang_validator_prefix), data=body, headers=json_headers)
-        bp.logger.info('yang-validator responded with a code {}'.format(response.status_code))
+        response = session.post(
+            f'{yang_validator_prefix}/v2/rfc',
+            data=YANG_VALIDATOR_PROBE_BODY,
+            headers=json_headers,
+            timeout=HEALTHCHECK_TIMEOUT,
+        )
+        bp.logger.info('yang-validator responded with a code %s', response.status_code)
         if response.status_code == 200:
-            response_message = response.json()
+            response_message = orjson.loads(response.content)
             if response_message:
-                return make_response(
-                    jsonify(
-                        {
-                            'info': '{} is available'.format(service_name),
-                            'status': 'running',
-                            'message': '{} successfully fetched and validated RFC{}'.format(service_name, rfc_number),
-                        },
-                    ),
-                    200,
+                return available_response(
+                    service_name,
+                    'running',
+                    f'{service_name} successfully fetched and validated RFC{YANG_VALIDATOR_PROBE_RFC}',
                 )
             else:
-                return make_response(
-                    jsonify(
-                        {
-                            'info': '{} is available'.format(service_name),
-                            'status': 'problem',
-                            'message': 'RFC{} responded with empty body'.format(rfc_number),
-                        },
-                    ),
-                    200,
+                return available_response(
+                    service_name,
+                    'problem',
+                    f'RFC{YANG_VALIDATOR_PROBE_RFC} responded with empty body',
                 )
         elif response.status_code == 400 or response.status_code == 404:
-            return make_response(
-                jsonify(
-                    {
-                        'info': '{} is available'.format(service_name),
-                        'status': 'problem',
-                        'message': '{} responded with a code {}'.format(service_name, response.status_code),
-                    },
-                ),
-                200,
+            return available_response(
+                service_name,
+                'problem',
+                f'{service_name} responded with a code {response.status_code}',
             )
         else:
-            err = '{} responded with a code {}'.format(service_name, response.status_code)
-            return make_response(jsonify(error_response(service_name, err)), 200)
+            err = f'{service_name} responded with a code {response.status_code}'
+            return error_response(service_name, err)
+    except requests.exceptions.Timeout as err:
+        bp.logger.error('%s request timed out. Error: %s', service_name, err)
+        return error_response(service_name, 'timeout')
     except Exception as err:
-        bp.logger.error('Cannot ping {}. Error: {}'.format(service_name, err))
-        return make_response(jsonify(error_response(service_name, err)), 200)
+        bp.logger.error('Cannot ping %s. Error: %s', service_name, err)
+        return error_response(service_name, err)
 
 
-@bp.route('/yang-search-admin', methods=['GET'])
-def health_check_yang_search_admin():
+@bp.route('/yang-validator-admin', methods=['GET'])
+def health_check_yang_validator_admin():
+    return json_response(probe_yang_validator())
+
+
+@cached_healthcheck('yang-search-admin')
+@single_flight('yang-search-admin')
+def probe_yang_search() -> dict:
     service_name = 'yang-search'
-    yang_search_prefix = '{}/search'.format(app_config.w_yangcatalog_api_prefix)
-    module_name = 'yang-catalog,2018-04-03,ietf'
+    yang_search_prefix = f'{app_config.w_yangcatalog_api_prefix}/search'
     try:
-        response = requests.get('{}/modules/{}'.format(yang_search_prefix, module_name), headers=json_headers)
-        bp.logger.info('yang-search responded with a code {}'.format(response.status_code))
+        response = session.get(
+            f'{yang_search_prefix}/modules/{YANG_SEARCH_PROBE_MODULE}',
+            headers=json_headers,
+            timeout=HEALTHCHECK_TIMEOUT,
+        )
+        bp.logger.info('yang-search responded with a code %s', response.status_code)
         if response.status_code == 200:
-            response_message = response.json()
-            if response_message['module'] and len(response_message['module']) > 0:
-                return make_response(
-                    jsonify(
-                        {
-                            'info': '{} is available'.format(service_name),
-                            'status': 'running',
-                            'message': '{} module successfully found'.format(module_name),
-                        },
-                    ),
-                    200,
+            response_message = orjson.loads(response.content)
+            modules = response_message.get('module')
+            if isinstance(modules, list) and modules:
+                return available_response(
+                    service_name,
+                    'running',
+                    f'{YANG_SEARCH_PROBE_MODULE} module successfully found',
                 )
             else:
-                return make_response(
-                    jsonify(
-                        {
-                            'info': '{} is available'.format(service_name),
-                            'status': 'problem',
-                            'message': 'Module {} not found'.format(module_name),
-                        },
-                    ),
-                    200,
-                )
+                return available_response(service_name, 'problem', f'Module {YANG_SEARCH_PROBE_MODULE} not found')
         elif response.status_code == 400 or response.status_code == 404:
-            err = json.loads(response.text).get('error')
-            return make_response(
-                jsonify(
-                    {
-                        'info': '{} is available'.format(service_name),
-                        'status': 'problem',
-                        'message': '{} responded with a message: {}'.format(service_name, err),
-                    },
-                ),
-                200,
-            )
+            err = orjson.loads(response.content).get('error')
+            return available_response(service_name, 'problem', f'{service_name} responded with a message: {err}')
         else:
-            err = '{} responded with a code {}'.format(service_name, response.status_code)
-            return make_response(jsonify(error_response(service_name, err)), 200)
+            err = f'{service_name} responded with a code {response.status_code}'
+            return error_response(service_name, err)
+    except requests.exceptions.Timeout as err:
+        bp.logger.error('%s request timed out. Error: %s', service_name, err)
+        return error_response(service_name, 'timeout')
     except Exception as err:
-        bp.logger.error('Cannot ping {}. Error: {}'.format(service_name, err))
-        return make_response(jsonify(error_response(service_name, err)), 200)
+        bp.logger.error('Cannot ping %s. Error: %s', service_name, err)
+        return error_response(service_name, err)
 
 
-@bp.route('/confd-admin', methods=['GET'])
-def health_check_confd_admin():
+@bp.route('/yang-search-admin', methods=['GET'])
+def health_check_yang_search_admin():
+    return json_response(probe_yang_search())
+
+
+@cached_healthcheck('confd-admin')
+@single_flight('confd-admin')
+def probe_confd_admin() -> dict:
     service_name = 'ConfD'
 
     try:
         # Check if ConfD is running
-        response = app.confdService.get_restconf()
+        response = get_confd_restconf()
 
         if response.status_code == 200:
             bp.logger.info('ConfD is running')
             # Check if ConfD is filled with data
             mod_key = 'yang-catalog,2018-04-03,ietf'
-            response = app.confdService.get_module(mod_key)
+            response = run_probe(app.confdService.get_module, mod_key)
 
-            bp.logger.info('Status code {} while getting data of {} module'.format(response.status_code, mod_key))
+            bp.logger.info('Status code %s while getting data of %s module', response.status_code, mod_key)
             if response.status_code != 200 and response.status_code != 201 and response.status_code != 204:
-                response = {
-                    'info': 'Not OK - ConfD is not filled',
-                    'status': 'problem',
-                    'message': 'Cannot get data of yang-catalog:modules',
-                }
-                return make_response(jsonify(response), 200)
+                response = status_response(
+                    'Not OK - ConfD is not filled',
+                    'problem',
+                    'Cannot get data of yang-catalog:modules',
+                )
+                return response
             else:
                 module_data = response.json()
                 num_of_modules = len(module_data['yang-catalog:module'])
-                bp.logger.info('{} module successfully loaded from ConfD'.format(mod_key))
+                bp.logger.info('%s module successfully loaded from ConfD', mod_key)
                 if num_of_modules > 0:
-                    return make_response(
-                        jsonify(
-                            {
-                                'info': 'ConfD is running',
-                                'status': 'running',
-                                'message': '{} successfully loaded from ConfD'.format(mod_key),
-                            },
-                        ),
-                        200,
-                    )
+                    return status_response('ConfD is running', 'running', f'{mod_key} successfully loaded from ConfD')
                 else:
-                    return make_response(
-                        jsonify(
-                            {
-                                'info': 'ConfD is running',
-                                'status': 'problem',
-                                'message': 'ConfD is running but no modules loaded',
-                            },
-                        ),
-                        200,
-                    )
+                    return status_response('ConfD is running', 'problem', 'ConfD is running but no modules loaded')
         else:
             bp.logger.info('Cannot get data from ConfD')
             err = 'Cannot get data from ConfD'
-            return make_response(jsonify(error_response(service_name, err)), 200)
+            return error_response(service_name, err)
+    except FutureTimeoutError:
+        bp.logger.error('%s did not respond in %s seconds', service_name, PROBE_TIMEOUT)
+        return error_response(service_name, 'timeout')
     except Exception as err:
-        bp.logger.error('Cannot ping {}. Error: {}'.format(service_name, err))
-        return make_response(jsonify(error_response(service_name, err)), 200)
+        bp.logger.error('Cannot ping %s. Error: %s', service_name, err)
+        return error_response(service_name, err)
 
 
-@bp.route('/redis-admin', methods=['GET'])
-def health_check_redis_admin():
+@bp.route('/confd-admin', methods=['GET'])
+def health_check_confd_admin():
+    return json_response(probe_confd_admin())
+
+
+def probe_redis_admin() -> dict:
     service_name = 'Redis'
 
     try:
         redis_key = 'yang-catalog@2018-04-03/ietf'
-        result = app.redisConnection.get_module(redis_key)
+        result = run_probe(app.redisConnection.get_module, redis_key)
         if result == '{}':
-            response = {
-                'info': 'Not OK - Redis is not filled',
-                'status': 'problem',
-                'message': 'Cannot get yang-catalog@2018-04-03/ietf',
-            }
+            response = status_response(
+                'Not OK - Redis is not filled',
+                'problem',
+                'Cannot get yang-catalog@2018-04-03/ietf',
+            )
         else:
-            bp.logger.info('{} module successfully loaded from Redis'.format(redis_key))
-            response = {
-                'info': 'Redis is running',
-                'status': 'running',
-                'message': '{} successfully loaded from Redis'.format(redis_key),
-            }
+            bp.logger.info('%s module successfully loaded from Redis', redis_key)
+            response = status_response('Redis is running', 'running', f'{redis_key} successfully loaded from Redis')
 
+    except FutureTimeoutError:
+        bp.logger.error('Redis did not respond in %s seconds', PROBE_TIMEOUT)
+        return error_response(service_name, 'timeout')
     except Exception as err:
-        bp.logger.error('Cannot ping Redis. Error: {}'.format(err))
+        bp.logger.error('Cannot ping Redis. Error: %s', err)
         return error_response(service_name, err)
 
     return response
 
 
-@bp.route('/yangcatalog', methods=['GET'])
-def health_check_yangcatalog():
+@bp.route('/redis-admin', methods=['GET'])
+def health_check_redis_admin():
+    return json_response(probe_redis_admin())
+
+
+@cached_healthcheck('yangcatalog')
+@single_flight('yangcatalog')
+def probe_yangcatalog() -> dict:
     service_name = 'yangcatalog'
     status = 'running'
     message = 'All URLs responded with status code 200'
-    additional_info = []
-
-    urls = [
-        {'url': 'http://yangcatalog.org', 'verify': True},
-        {'url': 'http://www.yangcatalog.org', 'verify': True},
-        {'url': 'https://yangcatalog.org', 'verify': True},
-        {'url': 'https://www.yangcatalog.org', 'verify': True},
-        {'url': 'http://yangvalidator.com', 'verify': True},
-        {'url': 'http://www.yangvalidator.com', 'verify': True},
-        {'url': 'https://yangvalidator.com', 'verify': True},
-        {'url': 'https://www.yangvalidator.com', 'verify': True},
-        {'url': 'http://18.224.127.129', 'verify': False},
-        {'url': 'https://18.224.127.129', 'verify': False},
-        {'url': 'http://[2600:1f16:ba:200:a10d:3212:e763:e720]', 'verify': False},
-        {'url': 'https://[2600:1f16:ba:200:a10d:3212:e763:e720]', 'verify': False},
-    ]
-
-    for item in urls:
-        url = item.get('url', '')
+
+    def probe(url: str, verify: bool) -> dict:
         result = {'label': url}
+        response = session.get(url, verify=verify, timeout=HEALTHCHECK_TIMEOUT)
+        status_code = response.status_code
+        bp.logger.info('URl: %s Status code: %s', url, status_code)
+        result['message'] = f'{status_code} OK'
+        return result
+
+    results = {}
+    futures = {get_executor('yangcatalog').submit(probe, url, verify): url for url, verify in YANGCATALOG_URLS}
+    for future in as_completed(futures):
+        url = futures[future]
         try:
-            response = requests.get(url, verify=item.get('verify', True))
-            status_code = response.status_code
-            bp.logger.info('URl: {} Status code: {}'.format(url, status_code))
-            result['message'] = '{} OK'.format(status_code)
+            results[url] = future.result()
+        except requests.exceptions.Timeout:
+            bp.logger.error('URl: %s timed out', url)
+            results[url] = {'label': url, 'message': 'timeout'}
+            status = 'problem'
+            message = 'Problem occured, see additional info'
         except Exception:
-            result['message'] = '500 NOT OK'
+            results[url] = {'label': url, 'message': '500 NOT OK'}
             status = 'problem'
             message = 'Problem occured, see additional info'
-        additional_info.append(result)
-
-    return make_response(
-        jsonify(
-            {
-                'info': '{} is available'.format(service_name),
-                'status': status,
-                'message': message,
-                'additional_info': additional_info,
-            },
-        ),
-        200,
-    )
+    additional_info = [results[url] for url, _ in YANGCATALOG_URLS]
+
+    return {
+        'info': f'{service_name} is available',
+        'status': status,
+        'message': message,
+        'additional_info': additional_info,
+    }
+
+
+@bp.route('/yangcatalog', methods=['GET'])
+def health_check_yangcatalog():
+    return json_response(probe_yangcatalog())
 
 
 @bp.route('/cronjobs', methods=['GET'])
 def check_cronjobs():
+    path = os.path.join(app_config.d_temp, 'cronjob.json')
     try:
-        with open('{}/cronjob.json'.format(app_config.d_temp), 'r') as f:
-            file_content = json.load(f)
+        mtime = os.stat(path).st_mtime_ns
+        # the file is parsed again only when it was changed since the last request
+        if mtime != cronjobs_cache['mtime']:
+            with open(path, 'r') as f:
+                cronjobs_cache['data'] = json.load(f)
+            cronjobs_cache['mtime'] = mtime
     except (FileNotFoundError, json.decoder.JSONDecodeError):
         bp.logger.error('cronjob.json file does not exist')
-        file_content = {}
-    return make_response(jsonify({'data': file_content}), 200)
+        cronjobs_cache.update(mtime=None, data={})
+    return json_response({'data': cronjobs_cache['data']})
 
 
-@bp.route('/celery', methods=['GET'])
-def health_check_celery():
+@single_flight('celery')
+def probe_celery() -> dict:
+    """Check that at least one Celery worker is alive, without occupying a worker with a task."""
+    try:
+        replies = app_config.celery_app.control.ping(timeout=CELERY_PING_TIMEOUT)
+    except Exception as err:
+        bp.logger.exception('Cannot ping Celery workers')
+        return error_response('Celery', err)
+    if not replies:
+        return status_response(
+            'Not OK - Celery is not available',
+            'down',
+            f'No worker responded to ping in {CELERY_PING_TIMEOUT} seconds',
+        )
+    return available_response('Celery', 'running', f'{len(replies)} worker(s) responded to ping')
+
+
+@cached_healthcheck('celery-deep', ttl=CELERY_DEEP_CHECK_CACHE_TTL)
+@single_flight('celery-deep')
+def probe_celery_deep() -> dict:
+    """Run the test task on a Celery worker and wait for its result."""
     result = test_task.s('test', 1).apply_async()
-    attempts = 3
-    status = StatusMessage.IN_PROGRESS.value
-    reason = ''
-    while attempts > 0:
-        status, reason = get_response(app_config.celery_app, result.id)
-        if status == StatusMessage.IN_PROGRESS:
-            time.sleep(5)
-            attempts -= 1
-            continue
-        break
+    try:
+        # returns as soon as the worker publishes the result instead of polling the backend
+        task_output = result.get(timeout=CELERY_TEST_TASK_TIMEOUT, propagate=False)
+        if result.successful():
+            status, reason = StatusMessage.SUCCESS.value, task_output
+        else:
+            status, reason = StatusMessage.FAIL.value, str(result.traceback)
+    except CeleryTimeoutError:
+        bp.logger.info('Celery test task did not finish in %s seconds', CELERY_TEST_TASK_TIMEOUT)
+        status, reason = StatusMessage.IN_PROGRESS.value, ''
     message_mapping = {
         StatusMessage.IN_PROGRESS.value: (
             'Waiting for the finish of the test task but only one task can be run at a time, so it\'s possible that '
@@ -531,21 +729,49 @@ def health_check_celery():
         StatusMessage.SUCCESS.value: f'Test task finished successfully with such message: {reason}',
         StatusMessage.FAIL.value: f'Test task failed with such traceback: {reason}',
     }
-    return make_response(
-        jsonify(
-            {
-                'info': 'Celery is available',
-                'status': 'running' if status == StatusMessage.SUCCESS else 'problem',
-                'message': message_mapping.get(status),
-            },
-        ),
-        200,
+    return status_response(
+        'Celery is available',
+        'running' if status == StatusMessage.SUCCESS else 'problem',
+        message_mapping.get(status),
     )
 
 
+@bp.route('/celery', methods=['GET'])
+def health_check_celery():
+    if request.args.get('deep') == '1':
+        return json_response(probe_celery_deep())
+    return json_response(probe_celery())
+
+
+# endpoint -> (service name, probe) for every service listed by /services-list
+service_probes = {
+    'opensearch': ('OpenSearch', probe_opensearch),
+    'confd-admin': ('ConfD', probe_confd_admin),
+    'redis-admin': ('Redis', probe_redis_admin),
+    'yang-search-admin': ('YANG search', probe_yang_search),
+    'yang-validator-admin': ('YANG validator', probe_yang_validator),
+    'yangre-admin': ('YANGre', probe_yangre),
+    'nginx': ('NGINX', probe_nginx),
+    'yangcatalog': ('YangCatalog', probe_yangcatalog),
+    'celery': ('Celery', probe_celery),
+}
+# the services list never changes, so it is serialized only once
+services_list_body = orjson.dumps(
+    [{'name': name, 'endpoint': endpoint} for endpoint, (name, _) in service_probes.items()],
+)
+
+
+def status_response(info: str, status: str, message: str) -> dict:
+    return {'info': info, 'status': status, 'message': message}
+
+
+def available_response(service_name: str, status: str, message: str) -> dict:
+    return status_response(f'{service_name} is available', status, message)
+
+
 def error_response(service_name, err):
     return {
-        'info': 'Not OK - {} is not available'.format(service_name),
+        'info': f'Not OK - {service_name} is not available',
         'status': 'down',
-        'error': 'Cannot ping {}. Error: {}'.format(service_name, err),
+        'error': f'Cannot ping {service_name}. Error: {err}',
     }
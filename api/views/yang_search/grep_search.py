@@ -4,6 +4,7 @@ import subprocess
 import typing as t
 from configparser import ConfigParser
 from datetime import datetime, timedelta
+from functools import lru_cache
 
 from api.cache.api_cache import cache
 from api.views.yang_search.constants import GREP_SEARCH_CACHE_TIMEOUT
@@ -15,6 +16,13 @@ from utility.staticVariables import ORGANIZATIONS
 from utility.util import validate_revision
 
 
+@lru_cache(maxsize=1)
+def _read_query_template() -> str:
+    query_path = os.path.join(os.environ['BACKEND'], 'api', 'views', 'yang_search', 'json', 'grep_search.json')
+    with open(query_path) as query_file:
+        return query_file.read()
+
+
 class GrepSearch:
     """
     Class is used to perform a grep-like search through text of all available modules.
@@ -35,9 +43,8 @@ class GrepSearch:
 
         self.listdir_results_cache_key = f'listdir_{self.all_modules_directory}'
 
-        query_path = os.path.join(os.environ['BACKEND'], 'api', 'views', 'yang_search', 'json', 'grep_search.json')
-        with open(query_path) as query_file:
-            self.query = json.load(query_file)
+        # the query is modified while searching, so every instance gets its own copy of the template
+        self.query = json.loads(_read_query_template())
 
         log_file_path = os.path.join(config.get('Directory-Section', 'logs'), 'yang.log')
         self.logger = log.get_logger('yc-opensearch', log_file_path)
@@ -31,9 +31,8 @@ from shutil import copy2
 
 import utility.log as log
 from automatic_push.utils import (
-    check_early_revisions,
-    check_name_no_revision_exist,
     get_forked_worktree,
+    prune_stale_revisions,
     push_untracked_files,
 )
 from utility.create_config import create_config
@@ -122,7 +121,7 @@ class IanaPush:
         for module in modules:
             data = module.attrib
             for attributes in module:
-                prop = attributes.tag.split(namespace)[-1]
+                prop = attributes.tag.rpartition(namespace)[2]
                 data[prop] = attributes.text or ''
             if data.get('iana') == 'Y' and data.get('file'):
                 if data['file'] in remove_from_new:
@@ -132,11 +131,8 @@ class IanaPush:
                 copy2(src, dst)
 
     def _check_iana_standard_dir(self):
-        self.logger.info(f'Checking module filenames without revision in {self.iana_standard_dir}')
-        check_name_no_revision_exist(self.iana_standard_dir, self.logger)
-
-        self.logger.info(f'Checking for early revision in {self.iana_standard_dir}')
-        check_early_revisions(self.iana_standard_dir, self.logger)
+        self.logger.info(f'Removing stale revisions of modules in {self.iana_standard_dir}')
+        prune_stale_revisions(self.iana_standard_dir, self.logger)
 
 
 if __name__ == '__main__':
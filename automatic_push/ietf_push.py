@@ -27,20 +27,24 @@ __email__ = 'bohdan.konovalenko@pantheon.tech'
 
 import filecmp
 import glob
+import io
 import json
 import os
 import shutil
+import typing as t
+from concurrent.futures import ThreadPoolExecutor
 from configparser import ConfigParser
 from dataclasses import dataclass
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 import utility.log as log
 from automatic_push.utils import (
-    check_early_revisions,
-    check_name_no_revision_exist,
     extract_rfc_tgz,
     get_forked_worktree,
+    prune_stale_revisions,
     push_untracked_files,
 )
 from utility import message_factory
@@ -57,6 +61,13 @@ DEFAULT_SCRIPT_CONFIG = ScriptConfig(
     arglist=None if __name__ == '__main__' else [],
 )
 
+# number of draft modules downloaded concurrently
+DRAFT_DOWNLOAD_WORKERS = 32
+# seconds to wait for a draft module download, failed downloads are retried by the session
+DRAFT_DOWNLOAD_TIMEOUT = 30
+# the RFC tarball is read from the response in chunks of this size instead of being held in memory whole
+TGZ_BUFFER_SIZE = 2 * 1024 * 1024
+
 
 def main(script_conf: ScriptConfig = DEFAULT_SCRIPT_CONFIG.copy()):
     args = script_conf.args
@@ -75,17 +86,31 @@ class IetfPush:
         self.send_message = send_message
 
         self.config = config
-        self.rfc_exceptions_file_path = self.config.get('Directory-Section', 'rfc-exceptions')
-        self.verified_commits_file_path = self.config.get('Directory-Section', 'commit-dir')
-        self.ietf_rfc_url = self.config.get('Web-Section', 'ietf-RFC-tar-private-url')
-        self.ietf_draft_url = config.get('Web-Section', 'ietf-draft-private-url')
-        self.my_uri = config.get('Web-Section', 'my-uri')
-        self.domain_prefix = config.get('Web-Section', 'domain-prefix')
-        ietf_directory = self.config.get('Directory-Section', 'ietf-directory')
-        self.rfc_directory = os.path.join(ietf_directory, 'YANG-rfc')
-        self.is_production = self.config.get('General-Section', 'is-prod') == 'True'
-        log_directory = self.config.get('Directory-Section', 'logs')
+        directory_section = config['Directory-Section']
+        web_section = config['Web-Section']
+        self.rfc_exceptions_file_path = directory_section['rfc-exceptions']
+        self.verified_commits_file_path = directory_section['commit-dir']
+        self.ietf_rfc_url = web_section['ietf-RFC-tar-private-url']
+        self.ietf_draft_url = web_section['ietf-draft-private-url']
+        self.my_uri = web_section['my-uri']
+        self.domain_prefix = web_section['domain-prefix']
+        self.rfc_directory = os.path.join(directory_section['ietf-directory'], 'YANG-rfc')
+        self.is_production = config.get('General-Section', 'is-prod') == 'True'
+        log_directory = directory_section['logs']
         self.logger = log.get_logger('ietf_push', f'{log_directory}/jobs/ietf-push.log')
+        # shared by all the downloads, so that the connections are kept alive between them
+        self.session = requests.Session()
+        retry = Retry(
+            total=5,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=('GET',),
+            # the last response is returned after the retries run out, so that it's handled like before retrying
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_maxsize=DRAFT_DOWNLOAD_WORKERS, max_retries=retry)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
 
     @job_log(file_basename=BASENAME)
     def __call__(self) -> list[JobLogMessage]:
@@ -119,17 +144,19 @@ class IetfPush:
 
     def _configure_file_paths(self):
         assert isinstance(self.repo.working_dir, str), 'always true'
-        self.tgz_path = os.path.join(self.repo.working_dir, 'rfc.tgz')
         self.temp_rfc_dir = os.path.join(self.repo.working_dir, 'standard/ietf/RFCtemp')
         self.rfc_dir = os.path.join(self.repo.working_dir, 'standard/ietf/RFC')
         self.experimental_path = os.path.join(self.repo.working_dir, 'experimental/ietf-extracted-YANG-modules')
         os.makedirs(self.experimental_path, exist_ok=True)
+        # directories which are known to exist, so that they are created at most once while saving the drafts
+        self.draft_directories = {self.experimental_path}
 
     def _extract_ietf_modules_tar(self) -> bool:
-        response = requests.get(self.ietf_rfc_url)
-        with open(self.tgz_path, 'wb') as zfile:
-            zfile.write(response.content)
-        return extract_rfc_tgz(self.tgz_path, self.temp_rfc_dir, self.logger)
+        with self.session.get(self.ietf_rfc_url, stream=True) as response:
+            response.raw.decode_content = True
+            # the archive is extracted straight from the response, without storing it in a file first
+            tgz_stream = io.BufferedReader(response.raw, buffer_size=TGZ_BUFFER_SIZE)
+            return extract_rfc_tgz(tgz_stream, self.temp_rfc_dir, self.logger)
 
     def _get_new_and_diff_rfc_files(self) -> tuple[list[str], list[str]]:
         diff_files = []
@@ -164,7 +191,7 @@ class IetfPush:
         os.chdir(self.rfc_dir)
         for filename in new_files + diff_files:
             file_path = os.path.join(self.rfc_directory, filename)
-            filename_without_revision = f'{filename.split("@")[0]}.yang'
+            filename_without_revision = f'{filename.partition("@")[0]}.yang'
             if not os.path.exists(file_path):
                 continue
             shutil.copy2(file_path, filename)
@@ -190,47 +217,59 @@ class IetfPush:
         self.logger.info('Updating IETF drafts download links')
         self._download_draft_modules_content()
 
-        self.logger.info(f'Checking module filenames without revision in {self.experimental_path}')
-        check_name_no_revision_exist(self.experimental_path, self.logger)
-
-        self.logger.info(f'Checking for early revision in {self.experimental_path}')
-        check_early_revisions(self.experimental_path, self.logger)
+        self.logger.info(f'Removing stale revisions of modules in {self.experimental_path}')
+        prune_stale_revisions(self.experimental_path, self.logger)
 
     def _download_draft_modules_content(self):
-        response = requests.get(self.ietf_draft_url)
+        response = self.session.get(self.ietf_draft_url)
         try:
             ietf_draft_json = response.json()
         except json.decoder.JSONDecodeError:
             self.logger.error(f'Unable to get content of {os.path.basename(self.ietf_draft_url)} file')
             ietf_draft_json = {}
-        for key in ietf_draft_json:
-            file_path = os.path.join(self.experimental_path, key)
-            yang_download_link = (
-                ietf_draft_json[key]['compilation_metadata'][2]
-                .split(
-                    'href="',
-                )[1]
-                .split('">Download')[0]
-            )
-            yang_download_link = yang_download_link.replace(self.domain_prefix, self.my_uri)
-            try:
-                file_content_response = requests.get(yang_download_link)
-            except ConnectionError:
-                self.logger.error(f'Unable to retrieve content of: {key} - {yang_download_link}')
-                continue
-            if 'text/html' in file_content_response.headers['content-type']:
-                self.logger.error(f'The content of "{key}" file is a broken html, download link: {yang_download_link}')
-                if not os.path.exists(file_path):
-                    continue
-                with open(file_path, 'r') as possibly_broken_module:
-                    lines = possibly_broken_module.readlines()
-                    module_is_broken = '<html>' in lines[1] and '</html>' in lines[-1]
-                if module_is_broken:
-                    self.logger.info(f'Deleted the file because of broken content: {key} - {yang_download_link}')
-                    os.remove(file_path)
-                continue
-            with open(file_path, 'w') as yang_file:
-                yang_file.write(file_content_response.text)
+        with ThreadPoolExecutor(max_workers=DRAFT_DOWNLOAD_WORKERS) as executor:
+            downloads = executor.map(self._download_draft_module, ietf_draft_json.items())
+            for key, yang_download_link, file_content_response in downloads:
+                if file_content_response is not None:
+                    self._save_draft_module(key, yang_download_link, file_content_response)
+
+    def _download_draft_module(self, draft: tuple[str, dict]) -> tuple[str, str, t.Optional[requests.Response]]:
+        key, draft_metadata = draft
+        download_anchor = draft_metadata['compilation_metadata'][2]
+        yang_download_link = download_anchor.partition('href="')[2].partition('">Download')[0]
+        yang_download_link = yang_download_link.replace(self.domain_prefix, self.my_uri)
+        try:
+            return key, yang_download_link, self.session.get(yang_download_link, timeout=DRAFT_DOWNLOAD_TIMEOUT)
+        except requests.RequestException as e:
+            self.logger.error(f'Unable to retrieve content of: {key} - {yang_download_link}: {e}')
+            return key, yang_download_link, None
+
+    def _save_draft_module(self, key: str, yang_download_link: str, file_content_response: requests.Response):
+        file_path = os.path.join(self.experimental_path, key)
+        if 'text/html' in file_content_response.headers['content-type']:
+            self.logger.error(f'The content of "{key}" file is a broken html, download link: {yang_download_link}')
+            if not os.path.exists(file_path):
+                return
+            with open(file_path, 'r') as possibly_broken_module:
+                lines = possibly_broken_module.readlines()
+                module_is_broken = '<html>' in lines[1] and '</html>' in lines[-1]
+            if module_is_broken:
+                self.logger.info(f'Deleted the file because of broken content: {key} - {yang_download_link}')
+                os.remove(file_path)
+            return
+        # the content is written as it was received, without decoding and re-encoding it, into a temporary file
+        # which then atomically replaces the module, so that a partially written module is never left behind
+        if (directory := os.path.dirname(file_path)) not in self.draft_directories:
+            os.makedirs(directory, exist_ok=True)
+            self.draft_directories.add(directory)
+        temp_file_path = f'{file_path}.tmp'
+        try:
+            with open(temp_file_path, 'wb') as yang_file:
+                yang_file.write(file_content_response.content)
+            os.replace(temp_file_path, file_path)
+        finally:
+            if os.path.exists(temp_file_path):
+                os.remove(temp_file_path)
 
 
 if __name__ == '__main__':
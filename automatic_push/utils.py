@@ -26,17 +26,27 @@ __email__ = 'bohdan.konovalenko@pantheon.tech, slavomir.mazur@pantheon.tech'
 
 import logging
 import os
+import re
 import tarfile
+import typing as t
+from collections import defaultdict
 from configparser import ConfigParser
 from dataclasses import dataclass
+from datetime import date
+from functools import lru_cache
 
 from git import GitCommandError, Repo
 
 from utility import repoutil, yangParser
-from utility.util import revision_to_date
 
 FORKED_WORKTREE_WORKING_BRANCH = 'fork-main'
 REPO_MAIN_BRANCH = 'main'
+# size of the buffer used to copy each member out of a tar archive, tarfile's default is only 16 KiB
+TAR_COPY_BUFFER_SIZE = 2 * 1024 * 1024
+# YYYY-MM-DD revision of a module
+REVISION_PATTERN = re.compile(r'(\d{4})-(\d{2})-(\d{2})')
+# <name>.yang or <name>@<revision>.yang
+YANG_FILENAME_PATTERN = re.compile(r'^(?P<name>[^@]+?)(?:@(?P<revision>\d{4}-\d{2}-\d{2}))?\.yang$')
 
 
 def get_forked_worktree(config: ConfigParser, logger: logging.Logger) -> repoutil.Worktree:
@@ -56,8 +66,10 @@ def get_forked_worktree(config: ConfigParser, logger: logging.Logger) -> repouti
                 config_user_email=config.get('General-Section', 'repo-config-email'),
             ),
         )
-        worktree.repo.git.pull('origin', REPO_MAIN_BRANCH)
-        worktree.repo.git.pull('fork', REPO_MAIN_BRANCH)
+        # both remotes were just fetched into the shared repository by update_forked_repository,
+        # so their branches are merged without fetching them again
+        worktree.repo.git.merge(f'origin/{REPO_MAIN_BRANCH}')
+        worktree.repo.git.merge(f'fork/{REPO_MAIN_BRANCH}')
     except Exception as e:
         logger.exception('Exception occurred while creating/updating the worktree:\n')
         raise e
@@ -94,9 +106,8 @@ def update_forked_repository(yang_models: str, config: ConfigParser, logger: log
             info = remote.fetch(REPO_MAIN_BRANCH)[0]
             logger.info(f'Remote: {remote.name} - Commit: {info.commit}')
 
-        # git pull origin main
-        origin = main_repo.remote('origin')
-        origin.pull(REPO_MAIN_BRANCH)
+        # git merge origin/main, origin was already fetched above
+        main_repo.git.merge(f'origin/{REPO_MAIN_BRANCH}')
 
         # git push fork main
         push_info = fork.push(REPO_MAIN_BRANCH)[0]
@@ -116,125 +127,115 @@ def get_latest_revision(path: str, logger: logging.Logger):
         :return         revision of the module at the given path
     """
     try:
-        stmt = yangParser.parse(path)
-        result = stmt.search_one('revision')
-        assert result
-        rev = result.arg
-    except Exception:
-        logger.warning(f'Cannot yangParser.parse {path}')
-        rev = None  # In case of invalid YANG syntax, None is returned
+        rev = _parse_latest_revision(os.path.realpath(path), os.stat(path).st_mtime_ns)
+    except OSError:
+        rev = None
+    if rev is None:
+        logger.warning(f'Cannot yangParser.parse {path}')  # In case of invalid YANG syntax, None is returned
 
     return rev
 
 
-def check_name_no_revision_exist(directory: str, logger: logging.Logger) -> None:
-    """
-    This function checks the format of all the modules' filename. If it contains module with a filename without
-    revision, we check if there is a module that has revision in its filename. If such module exists,
-    then module with no revision in filename will be removed.
+@lru_cache(maxsize=4096)
+def _parse_latest_revision(path: str, mtime_ns: int) -> t.Optional[str]:
+    # the modification time is a part of the cache key, so a module is parsed again only after it changes
+    try:
+        result = yangParser.parse(path).search_one('revision')
+    except Exception:
+        return None
+    return result.arg if result else None
 
-    Arguments:
-        :param directory    (str) full path to directory with yang modules
-        :param logger       (logging.Logger) formated logger with the specified name
-    """
-    logger.debug(f'Checking revision for directory: {directory}')
-    for _, _, files in os.walk(directory):
-        for basename in files:
-            if '@' not in basename:
-                continue
-            yang_file_name = basename.split('@')[0] + '.yang'
-            revision = basename.split('@')[1].split('.')[0]
-            yang_file_path = os.path.join(directory, yang_file_name)
-            exists = os.path.exists(yang_file_path)
-            if not exists:
-                continue
-            compared_revision = get_latest_revision(os.path.abspath(yang_file_path), logger)
-            if compared_revision is None:
-                continue
-            if revision == compared_revision:
-                os.remove(yang_file_path)
-
-
-def check_early_revisions(directory: str, logger: logging.Logger) -> None:
+
+def prune_stale_revisions(directory: str, logger: logging.Logger) -> None:
     """
-    This function checks all modules revisions and keeps only
-    ones that are the newest. If there are two modules with
-    two different revisions, then the older one is removed.
+    This function checks all modules revisions in a single pass over the directory and removes the files
+    which are superseded by another file of the same module:
+    I. A module with a filename without revision is removed if the same revision of the module
+    is stored in a file with the revision in its filename.
+    II. Only the newest revision of each module is kept, the older ones are removed.
 
     Arguments:
         :param directory    (str) full path to directory with yang modules
         :param logger       (logging.Logger) formated logger with the specified name
     """
-    for filename in (filenames := os.listdir(directory)):
-        module_name = _get_module_name(filename)  # Beware of some invalid file names such as '@2015-03-09.yang'
-        if module_name == '':
+    logger.debug(f'Checking revisions for directory: {directory}')
+    # module name -> [(filename, revision, whether the revision is a part of the filename)]
+    module_revisions = defaultdict(list)
+    with os.scandir(directory) as entries:
+        filenames = [entry.name for entry in entries if entry.is_file()]
+    for filename in filenames:
+        # Beware of some invalid file names such as '@2015-03-09.yang', they don't match
+        if not (match := YANG_FILENAME_PATTERN.match(filename)):
             continue
-        files_to_delete = []
-        revisions = []
-        for nested_filename in filenames:
-            if _get_module_name(nested_filename) != module_name:
-                continue
-            nested_filename_revision_part = nested_filename.split(module_name)[1]
-            if not _is_revision_part_valid(nested_filename_revision_part):
-                continue
-            files_to_delete.append(nested_filename)
-            revision = nested_filename_revision_part.split('.')[0].replace('@', '')
-            if revision == '':
-                yang_file_path = os.path.join(directory, nested_filename)
-                revision = get_latest_revision(os.path.abspath(yang_file_path), logger)
-                if revision is None:
-                    continue
-            revision = revision_to_date(revision)
-            if revision:
-                revisions.append(revision)
-                continue
-            # Probably revision filename contained invalid characters such as alphanumeric characters
-            logger.exception(f'Failed to process revision for {nested_filename}: (rev: {revision})')
-            revisions.append(revision)
-        if len(revisions) == 0:  # Single revision...
+        module_name, revision = match.group('name', 'revision')
+        if revision:
+            module_revisions[module_name].append((filename, revision, True))
+            continue
+        revision = get_latest_revision(os.path.abspath(os.path.join(directory, filename)), logger)
+        if revision is not None:
+            module_revisions[module_name].append((filename, revision, False))
+    for module_name, revisions in module_revisions.items():
+        filename_revisions = {revision for _, revision, in_filename in revisions if in_filename}
+        remaining_revisions = []
+        for filename, revision, in_filename in revisions:
+            if not in_filename and revision in filename_revisions:
+                os.remove(os.path.join(directory, filename))
+            else:
+                remaining_revisions.append((filename, revision))
+        if len(remaining_revisions) < 2 or 'iana-if-type' in module_name:
             continue
         # Keep the latest (max) revision and delete the rest
-        latest = revisions.index(max(revisions))
-        files_to_delete.remove(files_to_delete[latest])
-        for file_to_delete in files_to_delete:
-            if 'iana-if-type' in file_to_delete:
-                break
-            if os.path.exists((path := os.path.join(directory, file_to_delete))):
-                os.remove(path)
-
-
-def _get_module_name(filename: str) -> str:
-    return filename.split('.yang')[0].split('@')[0]
+        latest_filename, _ = max(remaining_revisions, key=lambda filename_revision: _revision_key(filename_revision[1]))
+        for filename, _ in remaining_revisions:
+            if filename != latest_filename:
+                os.remove(os.path.join(directory, filename))
 
 
-def _is_revision_part_valid(revision_part: str) -> bool:
-    return revision_part.startswith('.') or revision_part.startswith('@')
+def _revision_key(revision: str) -> date:
+    # revisions read from the module itself aren't guaranteed to be valid dates, those are ordered as the oldest ones
+    if match := REVISION_PATTERN.fullmatch(revision):
+        try:
+            return date(*map(int, match.groups()))
+        except ValueError:
+            pass
+    return date(1970, 1, 1)
 
 
-def extract_rfc_tgz(tgz_path: str, extract_to: str, logger: logging.Logger) -> bool:
+def extract_rfc_tgz(tgz_file: t.BinaryIO, extract_to: str, logger: logging.Logger) -> bool:
     """
-    Extract downloaded rfc.tgz file to directory and remove file.
+    Extract the yang modules of the rfc.tgz archive read from the file object to directory.
 
     Arguments:
-        :param tgz_path     (str) full path to the rfc.tgz file
+        :param tgz_file     (BinaryIO) file object the gzipped rfc.tgz archive is read from, it is read as a stream,
+            so it can be e.g. the body of an HTTP response
         :param extract_to   (str) path to the directory where rfc.tgz is extractracted to
         :param logger       (logging.Logger) formated logger with the specified name
     :return  (bool) Indicates if the tar archive was opened or not
     """
     try:
-        tgz = tarfile.open(tgz_path)
-        tar_opened = True
-        tgz.extractall(extract_to)
-        tgz.close()
+        with tarfile.open(fileobj=tgz_file, mode='r|gz', copybufsize=TAR_COPY_BUFFER_SIZE) as tgz:
+            tgz.extractall(extract_to, members=_yang_members(tgz, extract_to, logger))
     except tarfile.ReadError:
-        tar_opened = False
         logger.warning(
             'Tarfile could not be opened. It might not have been generated yet. '
             'Did the module-compilation cron job run already?',
         )
-    os.remove(tgz_path)
+        return False
 
-    return tar_opened
+    return True
+
+
+def _yang_members(tgz: tarfile.TarFile, extract_to: str, logger: logging.Logger) -> t.Iterator[tarfile.TarInfo]:
+    # only the yang modules are used, members which would be extracted outside extract_to are skipped
+    extract_to = os.path.realpath(extract_to)
+    for member in tgz:
+        if not member.isfile() or not member.name.endswith('.yang'):
+            continue
+        member_path = os.path.realpath(os.path.join(extract_to, member.name))
+        if os.path.commonpath([extract_to, member_path]) != extract_to:
+            logger.warning(f'Skipping {member.name}, it would be extracted outside of {extract_to}')
+            continue
+        yield member
 
 
 @dataclass
@@ -29,6 +29,7 @@ import logging
 import os
 import shutil
 import tempfile
+from configparser import ConfigParser
 
 import utility.log as log
 from utility.create_config import create_config
@@ -45,13 +46,14 @@ DEFAULT_SCRIPT_CONFIG = ScriptConfig(
 )
 
 
-def run_populate_script(directory: str, notify: bool, logger: logging.Logger) -> bool:
+def run_populate_script(directory: str, notify: bool, config: ConfigParser, logger: logging.Logger) -> bool:
     """
-    Run populate.py script and return whether execution was successful or not.
+    Run populate.py script in this process and return whether execution was successful or not.
 
     Arguments:
         :param directory    (str) full path to directory with yang modules
         :param notify       (str) whether to send files for indexing
+        :param config       (ConfigParser) configuration of this job, it is shared by all the populate runs
         :param logger       (obj) formated logger with the specified name
     """
     successful = True
@@ -60,7 +62,7 @@ def run_populate_script(directory: str, notify: bool, logger: logging.Logger) ->
         submodule = getattr(module, 'populate')
         script_conf = submodule.DEFAULT_SCRIPT_CONFIG.copy()
         script_conf.set_args(sdo=True, dir=directory, notify_indexing=notify, official_source='ietf')
-        submodule.main(script_conf=script_conf)
+        submodule.main(script_conf=script_conf, config=config)
     except Exception:
         logger.exception('Error occurred while running populate.py script')
         successful = False
@@ -68,18 +70,19 @@ def run_populate_script(directory: str, notify: bool, logger: logging.Logger) ->
     return successful
 
 
-def populate_directory(directory: str, notify_indexing: bool, logger: logging.Logger):
+def populate_directory(directory: str, notify_indexing: bool, config: ConfigParser, logger: logging.Logger):
     """
     Run the populate script on a directory and return the result.
 
     Arguments:
         :param directory        (str) Directory to run the populate script on
         :param notify_indexing  (bool)
+        :param config           (ConfigParser)
         :param logger           (Logger)
         :return                 (tuple[bool, str]) First specifies whether the script ran successfully,
             second element is a corresponding text message.
     """
-    success = run_populate_script(directory, notify_indexing, logger)
+    success = run_populate_script(directory, notify_indexing, config, logger)
     message = 'Populate script finished successfully' if success else 'Error while calling populate script'
     return success, message
 
@@ -131,7 +134,7 @@ def main(script_conf: ScriptConfig = DEFAULT_SCRIPT_CONFIG.copy()) -> list[JobLo
                 (os.path.join(yang_models_dir, 'standard/etsi'), 'ETSI modules'),
             ):
                 module_dir_copy = module_dirs[original_module_dir]
-                directory_success, message = populate_directory(module_dir_copy, notify_indexing, logger)
+                directory_success, message = populate_directory(module_dir_copy, notify_indexing, config, logger)
                 success &= directory_success
                 messages.append({'label': label, 'message': message})
         except Exception as e:
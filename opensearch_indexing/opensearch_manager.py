@@ -107,6 +107,10 @@ class OpenSearchManager:
         """Returns a list of existing indices."""
         return list(self.opensearch.indices.get_alias().keys())
 
+    def count_indices(self) -> int:
+        """Returns the number of existing indices, it sends the same cluster state request as get_indices()."""
+        return len(self.get_indices())
+
     def put_index_mapping(self, index: OpenSearchIndices, body: dict) -> dict:
         """
         Update mapping for provided index.
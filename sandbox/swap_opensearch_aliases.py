@@ -13,16 +13,14 @@ def main():
     parser.add_argument('--delete', action='store_true', help='Delete the old index after removal')
     args = parser.parse_args()
     opensearch = OpenSearchManager().opensearch
-    opensearch.indices.update_aliases(
-        body={
-            'actions': [
-                {'remove': {'index': '*', 'alias': args.alias}},
-                {'add': {'index': args.add, 'alias': args.alias}},
-            ],
-        },
-    )
+    add_action = {'add': {'index': args.add, 'alias': args.alias}}
     if args.delete:
-        opensearch.indices.delete(args.remove)
+        # remove_index actions are applied first and deleting the old index drops its alias as well,
+        # so a remove action for it would fail the whole request
+        actions = [add_action, {'remove_index': {'index': args.remove}}]
+    else:
+        actions = [{'remove': {'index': args.remove, 'alias': args.alias}}, add_action]
+    opensearch.indices.update_aliases(body={'actions': actions}, params={'timeout': '60s'})
 
 
 if __name__ == '__main__':
@@ -0,0 +1,139 @@
+# Copyright The IETF Trust 2023, All Rights Reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+__copyright__ = 'Copyright The IETF Trust 2023, All Rights Reserved'
+__license__ = 'Apache License, Version 2.0'
+
+import io
+import logging
+import os
+import tarfile
+import tempfile
+import typing as t
+import unittest
+from unittest import mock
+
+from automatic_push.utils import extract_rfc_tgz, prune_stale_revisions
+
+
+class TestPruneStaleRevisionsClass(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.directory = temp_dir.name
+        self.logger = logging.getLogger(__name__)
+
+    def prune(self, files: dict[str, t.Optional[str]]) -> list[str]:
+        """
+        Create the files in the temporary directory, prune them and return the names of the remaining files.
+
+        Arguments:
+            :param files    (dict) filenames mapped to the revision found inside the file,
+                                   None if the file can't be parsed
+            :return         (list) sorted names of the files left in the directory
+        """
+        for filename in files:
+            with open(os.path.join(self.directory, filename), 'w'):
+                pass
+
+        def get_latest_revision(path: str, logger: logging.Logger) -> t.Optional[str]:
+            return files[os.path.basename(path)]
+
+        with mock.patch('automatic_push.utils.get_latest_revision', side_effect=get_latest_revision):
+            prune_stale_revisions(self.directory, self.logger)
+        return sorted(os.listdir(self.directory))
+
+    def test_same_revision_without_revision_in_filename_removed(self):
+        remaining = self.prune({'a@2020-01-01.yang': None, 'a.yang': '2020-01-01'})
+
+        self.assertEqual(remaining, ['a@2020-01-01.yang'])
+
+    def test_newer_revision_without_revision_in_filename_kept(self):
+        remaining = self.prune({'b@2019-01-01.yang': None, 'b.yang': '2020-01-01'})
+
+        self.assertEqual(remaining, ['b.yang'])
+
+    def test_only_latest_revision_kept(self):
+        remaining = self.prune({'c@2018-01-01.yang': None, 'c@2020-01-01.yang': None, 'c@2019-01-01.yang': None})
+
+        self.assertEqual(remaining, ['c@2020-01-01.yang'])
+
+    def test_unparseable_module_kept(self):
+        remaining = self.prune({'d.yang': None, 'd@2019-01-01.yang': None})
+
+        self.assertEqual(remaining, ['d.yang', 'd@2019-01-01.yang'])
+
+    def test_invalid_filenames_kept(self):
+        remaining = self.prune({'@2015-03-09.yang': None, 'e@2015-03.yang': None, 'e@2016-01-01.yang': None})
+
+        self.assertEqual(remaining, ['@2015-03-09.yang', 'e@2015-03.yang', 'e@2016-01-01.yang'])
+
+    def test_iana_if_type_revisions_kept(self):
+        remaining = self.prune({'iana-if-type@2019-01-01.yang': None, 'iana-if-type@2020-01-01.yang': None})
+
+        self.assertEqual(remaining, ['iana-if-type@2019-01-01.yang', 'iana-if-type@2020-01-01.yang'])
+
+    def test_invalid_revision_ordered_as_oldest(self):
+        for invalid_revision in ('2020-13-45', '2019-02-30', 'invalid'):
+            with self.subTest(invalid_revision=invalid_revision):
+                for filename in os.listdir(self.directory):
+                    os.remove(os.path.join(self.directory, filename))
+
+                remaining = self.prune({'f.yang': invalid_revision, 'f@2020-01-01.yang': None})
+
+                self.assertEqual(remaining, ['f@2020-01-01.yang'])
+
+
+class TestExtractRfcTgzClass(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        # the archive is extracted into a subdirectory, so that traversal out of it can be detected in temp_dir
+        self.temp_dir = temp_dir.name
+        self.extract_to = os.path.join(self.temp_dir, 'rfc')
+        os.mkdir(self.extract_to)
+        self.logger = logging.getLogger(__name__)
+
+    def make_tgz(self) -> io.BytesIO:
+        tgz_file = io.BytesIO()
+        with tarfile.open(fileobj=tgz_file, mode='w|gz') as tgz:
+            for name in ('a@2020-01-01.yang', '../x.yang', '/abs.yang', 'README.txt'):
+                content = f'module {name};'.encode()
+                member = tarfile.TarInfo(name)
+                member.size = len(content)
+                tgz.addfile(member, io.BytesIO(content))
+            symlink = tarfile.TarInfo('link.yang')
+            symlink.type = tarfile.SYMTYPE
+            symlink.linkname = '../x.yang'
+            tgz.addfile(symlink)
+        tgz_file.seek(0)
+        return tgz_file
+
+    def test_extract_rfc_tgz_only_safe_yang_files(self):
+        result = extract_rfc_tgz(self.make_tgz(), self.extract_to, self.logger)
+
+        self.assertTrue(result)
+        self.assertEqual(os.listdir(self.extract_to), ['a@2020-01-01.yang'])
+        self.assertEqual(os.listdir(self.temp_dir), ['rfc'])
+        self.assertFalse(os.path.exists('/abs.yang'))
+
+    def test_extract_rfc_tgz_invalid_archive(self):
+        result = extract_rfc_tgz(io.BytesIO(b'not a tgz archive'), self.extract_to, self.logger)
+
+        self.assertFalse(result)
+        self.assertEqual(os.listdir(self.extract_to), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,194 @@
+# Copyright The IETF Trust 2023, All Rights Reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+__copyright__ = 'Copyright The IETF Trust 2023, All Rights Reserved'
+__license__ = 'Apache License, Version 2.0'
+
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+import api.views.health_check as health_check
+from api.yangcatalog_api import app  # noqa: F401
+
+# seconds to wait for the threads started by the tests
+THREAD_TIMEOUT = 5
+
+
+class FakeRedis:
+    """Minimal in-memory replacement of the Redis connection used by cached_healthcheck."""
+
+    def __init__(self):
+        self.data = {}
+        self.expirations = {}
+
+    def get(self, key: str):
+        return self.data.get(key)
+
+    def setex(self, key: str, expiration: int, value: bytes):
+        self.data[key] = value
+        self.expirations[key] = expiration
+
+
+class TestCachedHealthcheckClass(unittest.TestCase):
+    def setUp(self):
+        self.redis = FakeRedis()
+        app_config_patcher = mock.patch.object(
+            health_check,
+            'app_config',
+            mock.MagicMock(redis=self.redis),
+            create=True,
+        )
+        app_config_patcher.start()
+        self.addCleanup(app_config_patcher.stop)
+
+    def test_cached_result_returned_within_ttl(self):
+        probe = mock.MagicMock(return_value={'status': 'running', 'message': 'OK'})
+        cached_probe = health_check.cached_healthcheck('test')(probe)
+
+        first_result = cached_probe()
+        second_result = cached_probe()
+
+        probe.assert_called_once()
+        self.assertEqual(first_result, second_result)
+        self.assertEqual(self.redis.expirations['healthcheck:test'], health_check.HEALTHCHECK_CACHE_TTL)
+
+    def test_failure_cached_for_shorter_time(self):
+        probe = mock.MagicMock(return_value={'status': 'down', 'message': 'Not OK'})
+        cached_probe = health_check.cached_healthcheck('test')(probe)
+
+        cached_probe()
+
+        self.assertEqual(self.redis.expirations['healthcheck:test'], health_check.HEALTHCHECK_FAILURE_CACHE_TTL)
+
+
+class TestConfdRestconfCacheClass(unittest.TestCase):
+    def setUp(self):
+        app_patcher = mock.patch.object(health_check, 'app', mock.MagicMock())
+        self.app = app_patcher.start()
+        self.addCleanup(app_patcher.stop)
+        health_check.confd_restconf_cache.update(timestamp=0.0, response=None)
+        self.addCleanup(health_check.confd_restconf_cache.update, timestamp=0.0, response=None)
+
+    def test_response_shared_within_ttl(self):
+        first_response = health_check.get_confd_restconf()
+        second_response = health_check.get_confd_restconf()
+
+        self.app.confdService.get_restconf.assert_called_once()
+        self.assertIs(first_response, second_response)
+
+    def test_request_sent_again_after_ttl(self):
+        health_check.get_confd_restconf()
+        # pretend the cached response is older than the TTL
+        health_check.confd_restconf_cache['timestamp'] -= health_check.CONFD_RESTCONF_CACHE_TTL
+        health_check.get_confd_restconf()
+
+        self.assertEqual(self.app.confdService.get_restconf.call_count, 2)
+
+
+class TestSingleFlightClass(unittest.TestCase):
+    def test_concurrent_callers_share_one_call(self):
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        @health_check.single_flight('test')
+        def probe() -> dict:
+            calls.append(threading.current_thread().name)
+            started.set()
+            release.wait(THREAD_TIMEOUT)
+            return {'status': 'running'}
+
+        results = {}
+
+        def call_probe():
+            results[threading.current_thread().name] = probe()
+
+        leader = threading.Thread(target=call_probe, name='leader')
+        follower = threading.Thread(target=call_probe, name='follower')
+        leader.start()
+        self.assertTrue(started.wait(THREAD_TIMEOUT))
+        follower.start()
+        # give the follower time to start waiting for the result of the leader's call
+        time.sleep(0.2)
+        release.set()
+        leader.join(THREAD_TIMEOUT)
+        follower.join(THREAD_TIMEOUT)
+
+        self.assertEqual(calls, ['leader'])
+        self.assertEqual(results, {'leader': {'status': 'running'}, 'follower': {'status': 'running'}})
+        self.assertNotIn('test', health_check.inflight_probes)
+
+    def test_exception_shared_and_next_call_runs_again(self):
+        probe = mock.MagicMock(side_effect=[RuntimeError('probe failed'), {'status': 'running'}])
+        single_flight_probe = health_check.single_flight('test')(probe)
+
+        with self.assertRaises(RuntimeError):
+            single_flight_probe()
+        result = single_flight_probe()
+
+        self.assertEqual(probe.call_count, 2)
+        self.assertEqual(result, {'status': 'running'})
+
+
+class TestCronjobsClass(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.cronjob_path = os.path.join(temp_dir.name, 'cronjob.json')
+        app_config_patcher = mock.patch.object(
+            health_check,
+            'app_config',
+            mock.MagicMock(d_temp=temp_dir.name),
+            create=True,
+        )
+        app_config_patcher.start()
+        self.addCleanup(app_config_patcher.stop)
+        health_check.cronjobs_cache.update(mtime=None, data={})
+        self.addCleanup(health_check.cronjobs_cache.update, mtime=None, data={})
+
+    def write_cronjobs(self, data: dict, mtime_ns: int):
+        with open(self.cronjob_path, 'w') as f:
+            json.dump(data, f)
+        os.utime(self.cronjob_path, ns=(mtime_ns, mtime_ns))
+
+    def test_cronjobs_parsed_only_after_change(self):
+        self.write_cronjobs({'job': {'result': 'Success'}}, 1_000_000_000)
+
+        with mock.patch.object(health_check.json, 'load', wraps=json.load) as json_load:
+            first_response = health_check.check_cronjobs()
+            second_response = health_check.check_cronjobs()
+            self.assertEqual(json_load.call_count, 1)
+
+            self.write_cronjobs({'job': {'result': 'Fail'}}, 2_000_000_000)
+            third_response = health_check.check_cronjobs()
+            self.assertEqual(json_load.call_count, 2)
+
+        self.assertEqual(first_response.json, {'data': {'job': {'result': 'Success'}}})
+        self.assertEqual(second_response.json, first_response.json)
+        self.assertEqual(third_response.json, {'data': {'job': {'result': 'Fail'}}})
+
+    def test_missing_cronjobs_file(self):
+        with mock.patch.object(health_check, 'bp', mock.MagicMock()):
+            response = health_check.check_cronjobs()
+
+        self.assertEqual(response.json, {'data': {}})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -20,138 +20,52 @@ __email__ = 'slavomir.mazur@pantheon.tech'
 import json
 import os
 import unittest
-from copy import deepcopy
+from types import MappingProxyType
 from unittest import mock
 
 from api.globalConfig import yc_gc
 from parseAndPopulate.modulesComplicatedAlgorithms import ModulesComplicatedAlgorithms
 
 
-class TestModulesComplicatedAlgorithmsClass(unittest.TestCase):
-    def __init__(self, *args, **kwargs):
-        super(TestModulesComplicatedAlgorithmsClass, self).__init__(*args, **kwargs)
-        self.resources_path = os.path.join(os.environ['BACKEND'], 'tests/resources')
-        with open(os.path.join(self.resources_path, 'parseAndPopulate_tests_data.json'), 'r') as f:
-            self.payloads = json.load(f)
-        self.yangcatalog_api_prefix = 'http://non-existing-site.com/api/'
-        self.save_file_dir = os.path.join(self.resources_path, 'all_modules')
-
-    """
-    TEST CASES:
-    I. 1st revision - 1.0.0
-    II. 2nd revision - major version update (2.0.0)
-    III. 3rd revision - major version update (3.0.0)
-    IV. 4th revision - major version update (4.0.0)
-    V. 5th revision - minor version update (4.1.0)
-    VI. 6th revision - patch version update (4.1.1)
+def json_clone(obj):
+    """Copy JSON-like data, which is considerably faster than deepcopy for plain dicts and lists.
+    Frozen data is copied into plain dicts and lists, so the copy can be modified.
     """
+    return json.loads(json.dumps(obj, default=dict))
 
-    @mock.patch('requests.get')
-    def test_parse_semver_init_revision(self, mock_requests_get: mock.MagicMock):
-        """Check whether the value of the 'derived-semantic-version' property was set correctly.
-        Only one - first revision of the module is passed to the modulesComplicatedAlgorithms script.
-        Expected 'derived-semantic-version': 1.0.0
 
-        Arguments:
-            :param mock_requests_get    (mock.MagicMock) requests.get() method is patched to return only
-            the necessary modules
-        """
-        modules = self.payloads['modulesComplicatedAlgorithms_prepare_json']['module']
-        modules = sorted(modules, key=lambda k: k['revision'])
-        # List od modules returned from patched /api/search/modules GET request
-        modules[0].pop('derived-semantic-version')
-        existing_modules = {'module': deepcopy(modules[:1])}
-        mock_requests_get.return_value.json.return_value = existing_modules
-        mock_requests_get.return_value.status_code = 200
-
-        module_to_parse = modules[0]
-        all_modules = {'module': [module_to_parse]}
+def freeze(obj):
+    """Make read-only views of JSON-like data shared by the tests, so that any modification of it fails loudly."""
+    if isinstance(obj, dict):
+        return MappingProxyType({key: freeze(value) for key, value in obj.items()})
+    if isinstance(obj, list):
+        return tuple(freeze(value) for value in obj)
+    return obj
 
-        complicated_algorithms = ModulesComplicatedAlgorithms(
-            yc_gc.logs_dir,
-            self.yangcatalog_api_prefix,
-            yc_gc.credentials,
-            self.save_file_dir,
-            yc_gc.temp_dir,
-            all_modules,
-            yc_gc.yang_models,
-            yc_gc.temp_dir,
-            yc_gc.json_ytree,
-        )
-
-        complicated_algorithms.parse_semver()
-
-        self.assertNotEqual(len(complicated_algorithms.new_modules), 0)
-        name = module_to_parse['name']
-        revision = module_to_parse['revision']
-        new_module = complicated_algorithms.new_modules[name].get(revision, {})
-        self.assertEqual(new_module.get('derived-semantic-version'), '1.0.0')
-
-    @mock.patch('requests.get')
-    def test_parse_semver_update_major(self, mock_requests_get: mock.MagicMock):
-        """Check whether the value of the 'derived-semantic-version' property was set correctly.
-        Module compilation status is 'passed-with-warnings' so a major version update is expected.
-        Expected 'derived-semantic-version': 2.0.0
-
-        Arguments:
-            :param mock_requests_get    (mock.MagicMock) requests.get() method is patched to return only
-                                                         the necessary modules
-        """
-        modules = self.payloads['modulesComplicatedAlgorithms_prepare_json']['module']
-        modules = sorted(modules, key=lambda k: k['revision'])
-        # List od modules returned from patched /api/search/modules GET request
-        modules[1].pop('derived-semantic-version')
-        existing_modules = {'module': deepcopy(modules[:2])}
-        mock_requests_get.return_value.json.return_value = existing_modules
-        mock_requests_get.return_value.status_code = 200
-
-        module_to_parse = modules[1]
-        all_modules = {'module': [module_to_parse]}
 
-        complicated_algorithms = ModulesComplicatedAlgorithms(
-            yc_gc.logs_dir,
-            self.yangcatalog_api_prefix,
-            yc_gc.credentials,
-            self.save_file_dir,
-            yc_gc.temp_dir,
-            all_modules,
-            yc_gc.yang_models,
-            yc_gc.temp_dir,
-            yc_gc.json_ytree,
-        )
-
-        complicated_algorithms.parse_semver()
-
-        self.assertNotEqual(len(complicated_algorithms.new_modules), 0)
-        name = module_to_parse['name']
-        revision = module_to_parse['revision']
-        new_module = complicated_algorithms.new_modules[name].get(revision, {})
-        self.assertEqual(new_module.get('derived-semantic-version'), '2.0.0')
-
-    @mock.patch('requests.get')
-    def test_parse_semver_update_major_2(self, mock_requests_get: mock.MagicMock):
-        """
-        Check whether the value of the 'derived-semantic-version' property was set correctly.
-        Module compilation status is 'passed' after previous 'passed-with-warnings'
-        so a major version update is expected.
-        Expected 'derived-semantic-version': 3.0.0
-
-        Arguments:
-            :param mock_requests_get    (mock.MagicMock) requests.get() method is patched to return only
-                                                         the necessary modules
-        """
-        modules = self.payloads['modulesComplicatedAlgorithms_prepare_json']['module']
-        modules = sorted(modules, key=lambda k: k['revision'])
-        # List od modules returned from patched /api/search/modules GET request
-        modules[2].pop('derived-semantic-version')
-        existing_modules = {'module': deepcopy(modules[:3])}
-        mock_requests_get.return_value.json.return_value = existing_modules
-        mock_requests_get.return_value.status_code = 200
-
-        module_to_parse = modules[2]
-        all_modules = {'module': [module_to_parse]}
-
-        complicated_algorithms = ModulesComplicatedAlgorithms(
+class TestModulesComplicatedAlgorithmsClass(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.resources_path = os.path.join(os.environ['BACKEND'], 'tests/resources')
+        with open(os.path.join(cls.resources_path, 'parseAndPopulate_tests_data.json'), 'r') as f:
+            cls.payloads = freeze(json.load(f))
+        cls.yangcatalog_api_prefix = 'http://non-existing-site.com/api/'
+        cls.save_file_dir = os.path.join(cls.resources_path, 'all_modules')
+        modules = cls.payloads['modulesComplicatedAlgorithms_prepare_json']['module']
+        cls.sorted_modules = tuple(sorted(modules, key=lambda k: k['revision']))
+        cls.parse_dependents_payload = cls.payloads['parse_dependents'][0]
+        # modifiable copy of the sorted modules, whose semvers are removed and restored around their parsing
+        cls.existing_modules_template = json_clone(cls.sorted_modules)
+
+    def setUp(self):
+        # /api/search/modules GET requests are answered by this mock in all the tests
+        requests_get_patcher = mock.patch('requests.get')
+        self.mock_requests_get = requests_get_patcher.start()
+        self.addCleanup(requests_get_patcher.stop)
+        self.mock_requests_get.return_value.status_code = 200
+
+    def make_complicated_algorithms(self, all_modules: dict) -> ModulesComplicatedAlgorithms:
+        return ModulesComplicatedAlgorithms(
             yc_gc.logs_dir,
             self.yangcatalog_api_prefix,
             yc_gc.credentials,
@@ -163,174 +77,89 @@ class TestModulesComplicatedAlgorithmsClass(unittest.TestCase):
             yc_gc.json_ytree,
         )
 
-        complicated_algorithms.parse_semver()
+    """
+    TEST CASES:
+    I. 1st revision - 1.0.0
+    II. 2nd revision - major version update (2.0.0)
+    III. 3rd revision - major version update (3.0.0)
+    IV. 4th revision - major version update (4.0.0)
+    V. 5th revision - minor version update (4.1.0)
+    VI. 6th revision - patch version update (4.1.1)
+    """
 
-        self.assertNotEqual(len(complicated_algorithms.new_modules), 0)
-        name = module_to_parse['name']
-        revision = module_to_parse['revision']
-        new_module = complicated_algorithms.new_modules[name].get(revision, {})
-        self.assertEqual(new_module.get('derived-semantic-version'), '3.0.0')
-
-    @mock.patch('requests.get')
-    def test_parse_semver_update_major_3(self, mock_requests_get: mock.MagicMock):
-        """Check whether the value of the 'derived-semantic-version' property was set correctly.
-        Module compilation status is 'passed', but errors occurred while running --check-update-from
-        so a major version update is expected.
-        Expected 'derived-semantic-version': 4.0.0
-
-        Arguments:
-            :param mock_requests_get    (mock.MagicMock) requests.get() method is patched to return only
-                                                         the necessary modules
+    def test_parse_semver_progression(self):
+        """Check whether the value of the 'derived-semantic-version' property was set correctly
+        for each of the test cases above. Revisions of the module are passed to the modulesComplicatedAlgorithms
+        script one by one, while the previous revisions are returned as already existing modules.
+        Expected 'derived-semantic-version' order: '1.0.0', '2.0.0', '3.0.0', '4.0.0', '4.1.0', '4.1.1'
         """
-        modules = self.payloads['modulesComplicatedAlgorithms_prepare_json']['module']
-        modules = sorted(modules, key=lambda k: k['revision'])
-        # List od modules returned from patched /api/search/modules GET request
-        modules[3].pop('derived-semantic-version')
-        existing_modules = {'module': deepcopy(modules[:4])}
-        mock_requests_get.return_value.json.return_value = existing_modules
-        mock_requests_get.return_value.status_code = 200
-
-        module_to_parse = modules[3]
-        all_modules = {'module': [module_to_parse]}
-
-        complicated_algorithms = ModulesComplicatedAlgorithms(
-            yc_gc.logs_dir,
-            self.yangcatalog_api_prefix,
-            yc_gc.credentials,
-            self.save_file_dir,
-            yc_gc.temp_dir,
-            all_modules,
-            yc_gc.yang_models,
-            yc_gc.temp_dir,
-            yc_gc.json_ytree,
-        )
-
-        complicated_algorithms.parse_semver()
-
-        self.assertNotEqual(len(complicated_algorithms.new_modules), 0)
-        name = module_to_parse['name']
-        revision = module_to_parse['revision']
-        new_module = complicated_algorithms.new_modules[name].get(revision, {})
-        self.assertEqual(new_module.get('derived-semantic-version'), '4.0.0')
-
-    @mock.patch('requests.get')
-    def test_parse_semver_update_minor(self, mock_requests_get: mock.MagicMock):
-        """Check whether the value of the 'derived-semantic-version' property was set correctly.
-        Module compilation status is 'passed', no error occurred while running --check-update-from,
-        but yang-trees are different so a minor version update is expected.
-        Expected 'derived-semantic-version': 4.1.0
-
-        Arguments:
-            :param mock_requests_get    (mock.MagicMock) requests.get() method is patched to return only
-                                                         the necessary modules
+        expected_semvers = ('1.0.0', '2.0.0', '3.0.0', '4.0.0', '4.1.0', '4.1.1')
+        for i, expected_semver in enumerate(expected_semvers):
+            existing_module = self.existing_modules_template[i]
+            with self.subTest(revision=existing_module['revision'], expected_semver=expected_semver):
+                # the parsed revision exists without its semver, which is restored for the next revisions
+                semver = existing_module.pop('derived-semantic-version')
+                try:
+                    # List of modules returned from patched /api/search/modules GET request
+                    existing_modules = {'module': self.existing_modules_template[: i + 1]}
+                    self.mock_requests_get.return_value.json.return_value = existing_modules
+                    module_to_parse = json_clone(existing_module)
+                    all_modules = {'module': [module_to_parse]}
+
+                    complicated_algorithms = self.make_complicated_algorithms(all_modules)
+
+                    complicated_algorithms.parse_semver()
+                finally:
+                    existing_module['derived-semantic-version'] = semver
+
+                self.assertNotEqual(len(complicated_algorithms.new_modules), 0)
+                name = module_to_parse['name']
+                revision = module_to_parse['revision']
+                new_module = complicated_algorithms.new_modules[name].get(revision, {})
+                self.assertEqual(new_module.get('derived-semantic-version'), expected_semver)
+
+    def test_parse_semver_progression_batched(self):
+        """Check whether the values of the 'derived-semantic-version' property were set correctly
+        for all the test cases above at once. The latest revision is parsed while none of the existing revisions
+        has 'derived-semantic-version' set, so semvers of all the revisions are calculated in one parse_semver() run.
+        Expected 'derived-semantic-version' order: '1.0.0', '2.0.0', '3.0.0', '4.0.0', '4.1.0', '4.1.1'
         """
-        modules = self.payloads['modulesComplicatedAlgorithms_prepare_json']['module']
-        modules = sorted(modules, key=lambda k: k['revision'])
-        # List od modules returned from patched /api/search/modules GET request
-        modules[4].pop('derived-semantic-version')
-        existing_modules = {'module': deepcopy(modules[:5])}
-        mock_requests_get.return_value.json.return_value = existing_modules
-        mock_requests_get.return_value.status_code = 200
-
-        module_to_parse = modules[4]
-        all_modules = {'module': [module_to_parse]}
-
-        complicated_algorithms = ModulesComplicatedAlgorithms(
-            yc_gc.logs_dir,
-            self.yangcatalog_api_prefix,
-            yc_gc.credentials,
-            self.save_file_dir,
-            yc_gc.temp_dir,
-            all_modules,
-            yc_gc.yang_models,
-            yc_gc.temp_dir,
-            yc_gc.json_ytree,
-        )
+        # the sorted modules are shared by all the tests, so they are copied before they are modified
+        modules = json_clone(self.sorted_modules)
+        for module in modules:
+            module.pop('derived-semantic-version')
+        # List of modules returned from patched /api/search/modules GET request
+        existing_modules = {'module': json_clone(modules[:-1])}
+        self.mock_requests_get.return_value.json.return_value = existing_modules
 
-        complicated_algorithms.parse_semver()
+        all_modules = {'module': modules[-1:]}
 
-        self.assertNotEqual(len(complicated_algorithms.new_modules), 0)
-        name = module_to_parse['name']
-        revision = module_to_parse['revision']
-        new_module = complicated_algorithms.new_modules[name].get(revision, {})
-        self.assertEqual(new_module.get('derived-semantic-version'), '4.1.0')
-
-    @mock.patch('requests.get')
-    def test_parse_semver_update_patch(self, mock_requests_get: mock.MagicMock):
-        """Check whether the value of the 'derived-semantic-version' property was set correctly.
-        Module compilation status is 'passed', no error occurred while running --check-update-from,
-        yang-trees are same so a patch version update is expected.
-        Expected 'derived-semantic-version': 4.1.1
-
-        Arguments:
-            :param mock_requests_get    (mock.MagicMock) requests.get() method is patched to return only
-                                                         the necessary modules
-        """
-        modules = self.payloads['modulesComplicatedAlgorithms_prepare_json']['module']
-        modules = sorted(modules, key=lambda k: k['revision'])
-        # List od modules returned from patched /api/search/modules GET request
-        modules[5].pop('derived-semantic-version')
-        existing_modules = {'module': deepcopy(modules[:6])}
-        mock_requests_get.return_value.json.return_value = existing_modules
-        mock_requests_get.return_value.status_code = 200
-
-        module_to_parse = modules[5]
-        all_modules = {'module': [module_to_parse]}
-
-        complicated_algorithms = ModulesComplicatedAlgorithms(
-            yc_gc.logs_dir,
-            self.yangcatalog_api_prefix,
-            yc_gc.credentials,
-            self.save_file_dir,
-            yc_gc.temp_dir,
-            all_modules,
-            yc_gc.yang_models,
-            yc_gc.temp_dir,
-            yc_gc.json_ytree,
-        )
+        complicated_algorithms = self.make_complicated_algorithms(all_modules)
 
         complicated_algorithms.parse_semver()
 
-        self.assertNotEqual(len(complicated_algorithms.new_modules), 0)
-        name = module_to_parse['name']
-        revision = module_to_parse['revision']
-        new_module = complicated_algorithms.new_modules[name].get(revision, {})
-        self.assertEqual(new_module.get('derived-semantic-version'), '4.1.1')
+        expected_semvers = ('1.0.0', '2.0.0', '3.0.0', '4.0.0', '4.1.0', '4.1.1')
+        for module, expected_semver in zip(modules, expected_semvers):
+            with self.subTest(revision=module['revision'], expected_semver=expected_semver):
+                new_module = complicated_algorithms.new_modules[module['name']].get(module['revision'], {})
+                self.assertEqual(new_module.get('derived-semantic-version'), expected_semver)
 
-    @mock.patch('requests.get')
-    def test_parse_semver_update_versions(self, mock_requests_get: mock.MagicMock):
+    def test_parse_semver_update_versions(self):
         """
         Check whether the value of the 'derived-semantic-version' property was set correctly.
         Module between two other revisions is parsed, which means, it will loop through all the available
         module revisions and assign 'derived-semantic-version' to them.
         Expected 'derived-semantic-version' order: '1.0.0', '2.0.0', '3.0.0', '4.0.0', '4.1.0', '4.1.1'
-
-        Arguments:
-            :param mock_requests_get    (mock.MagicMock) requests.get() method is patched to return only
-                                                         the necessary modules
         """
-        modules = self.payloads['modulesComplicatedAlgorithms_prepare_json']['module']
-        modules = sorted(modules, key=lambda k: k['revision'])
         # List of modules returned from patched /api/search/modules GET request
-        existing_modules = {'module': deepcopy(modules[:4] + modules[5:])}
+        existing_modules = {'module': json_clone(self.sorted_modules[:4] + self.sorted_modules[5:])}
 
-        mock_requests_get.return_value.json.return_value = existing_modules
-        mock_requests_get.return_value.status_code = 200
+        self.mock_requests_get.return_value.json.return_value = existing_modules
 
-        module_to_parse = modules[4]
+        module_to_parse = json_clone(self.sorted_modules[4])
         all_modules = {'module': [module_to_parse]}
 
-        complicated_algorithms = ModulesComplicatedAlgorithms(
-            yc_gc.logs_dir,
-            self.yangcatalog_api_prefix,
-            yc_gc.credentials,
-            self.save_file_dir,
-            yc_gc.temp_dir,
-            all_modules,
-            yc_gc.yang_models,
-            yc_gc.temp_dir,
-            yc_gc.json_ytree,
-        )
+        complicated_algorithms = self.make_complicated_algorithms(all_modules)
 
         complicated_algorithms.parse_semver()
 
@@ -340,70 +169,34 @@ class TestModulesComplicatedAlgorithmsClass(unittest.TestCase):
             '4.1.0',
         )
 
-    @mock.patch('requests.get')
-    def test_parse_non_requests_openconfig(self, mock_requests_get: mock.MagicMock):
-        module = self.payloads['parse_tree_type']['module'][0]
+    def test_parse_non_requests_openconfig(self):
+        module = json_clone(self.payloads['parse_tree_type']['module'][0])
         all_modules = {'module': [module]}
-        mock_requests_get.return_value.json.return_value = {'module': []}
-        mock_requests_get.return_value.status_code = 200
+        self.mock_requests_get.return_value.json.return_value = {'module': []}
 
-        complicated_algorithms = ModulesComplicatedAlgorithms(
-            yc_gc.logs_dir,
-            self.yangcatalog_api_prefix,
-            yc_gc.credentials,
-            self.save_file_dir,
-            yc_gc.temp_dir,
-            all_modules,
-            yc_gc.yang_models,
-            yc_gc.temp_dir,
-            yc_gc.json_ytree,
-        )
+        complicated_algorithms = self.make_complicated_algorithms(all_modules)
         complicated_algorithms.parse_non_requests()
         name = module['name']
         revision = module['revision']
         self.assertEqual(complicated_algorithms.new_modules[name][revision]['tree-type'], 'openconfig')
 
-    @mock.patch('requests.get')
-    def test_parse_non_requests_split(self, mock_requests_get: mock.MagicMock):
-        module = self.payloads['parse_tree_type']['module'][1]
+    def test_parse_non_requests_split(self):
+        module = json_clone(self.payloads['parse_tree_type']['module'][1])
         all_modules = {'module': [module]}
-        mock_requests_get.return_value.json.return_value = {'module': []}
-        mock_requests_get.return_value.status_code = 200
+        self.mock_requests_get.return_value.json.return_value = {'module': []}
 
-        complicated_algorithms = ModulesComplicatedAlgorithms(
-            yc_gc.logs_dir,
-            self.yangcatalog_api_prefix,
-            yc_gc.credentials,
-            self.save_file_dir,
-            yc_gc.temp_dir,
-            all_modules,
-            yc_gc.yang_models,
-            yc_gc.temp_dir,
-            yc_gc.json_ytree,
-        )
+        complicated_algorithms = self.make_complicated_algorithms(all_modules)
         complicated_algorithms.parse_non_requests()
         name = module['name']
         revision = module['revision']
         self.assertEqual(complicated_algorithms.new_modules[name][revision]['tree-type'], 'split')
 
-    @mock.patch('requests.get')
-    def test_parse_non_requests_combined(self, mock_requests_get: mock.MagicMock):
-        module = self.payloads['parse_tree_type']['module'][2]
+    def test_parse_non_requests_combined(self):
+        module = json_clone(self.payloads['parse_tree_type']['module'][2])
         all_modules = {'module': [module]}
-        mock_requests_get.return_value.json.return_value = {'module': []}
-        mock_requests_get.return_value.status_code = 200
+        self.mock_requests_get.return_value.json.return_value = {'module': []}
 
-        complicated_algorithms = ModulesComplicatedAlgorithms(
-            yc_gc.logs_dir,
-            self.yangcatalog_api_prefix,
-            yc_gc.credentials,
-            self.save_file_dir,
-            yc_gc.temp_dir,
-            all_modules,
-            yc_gc.yang_models,
-            yc_gc.temp_dir,
-            yc_gc.json_ytree,
-        )
+        complicated_algorithms = self.make_complicated_algorithms(all_modules)
         complicated_algorithms.parse_non_requests()
         name = module['name']
         revision = module['revision']
@@ -413,24 +206,13 @@ class TestModulesComplicatedAlgorithmsClass(unittest.TestCase):
         'parseAndPopulate.modulesComplicatedAlgorithms.ModulesComplicatedAlgorithms.parse_semver',
         mock.MagicMock(),
     )
-    @mock.patch('requests.get')
-    def test_parse_dependents(self, mock_requests_get: mock.MagicMock):
-        payload = self.payloads['parse_dependents']
-        all_modules = {'module': payload[0]['new']}
-        mock_requests_get.return_value.json.return_value = {'module': payload[0]['existing']}
-        mock_requests_get.return_value.status_code = 200
-
-        complicated_algorithms = ModulesComplicatedAlgorithms(
-            yc_gc.logs_dir,
-            self.yangcatalog_api_prefix,
-            yc_gc.credentials,
-            self.save_file_dir,
-            yc_gc.temp_dir,
-            all_modules,
-            yc_gc.yang_models,
-            yc_gc.temp_dir,
-            yc_gc.json_ytree,
-        )
+    def test_parse_dependents(self):
+        # the payload is shared by all the tests and is modified while parsing, so it's copied first
+        all_modules = {'module': json_clone(self.parse_dependents_payload['new'])}
+        existing_modules = {'module': json_clone(self.parse_dependents_payload['existing'])}
+        self.mock_requests_get.return_value.json.return_value = existing_modules
+
+        complicated_algorithms = self.make_complicated_algorithms(all_modules)
         complicated_algorithms.parse_requests()
         new = complicated_algorithms.new_modules
         self.assertIn({'name': 'n1', 'revision': '1', 'schema': None}, new['e1']['1']['dependents'])
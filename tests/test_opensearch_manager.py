@@ -98,6 +98,12 @@ class TestOpenSearchManagerWithEmptyIndexClass(TestOpenSearchManagerClass):
 
         self.assertTrue(index_exists)
 
+    def test_count_indices(self):
+        indices_count = self.opensearch_manager.count_indices()
+
+        self.assertGreaterEqual(indices_count, 1)
+        self.assertEqual(indices_count, len(self.opensearch_manager.get_indices()))
+
     def test_document_exists(self):
         in_es = self.opensearch_manager.document_exists(self.test_index, self.ietf_rip_module)
 
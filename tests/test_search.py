@@ -1,29 +1,54 @@
+import hashlib
 import json
 import os
+import typing as t
 import unittest
 from configparser import ConfigParser
 
+from flask.ctx import AppContext
 from opensearchpy import OpenSearch
+from opensearchpy.helpers import bulk
 
 from api.cache.api_cache import cache
 from api.views.yang_search.grep_search import GrepSearch
-from api.yangcatalog_api import app  # noqa: F401
+from api.yangcatalog_api import app
 from opensearch_indexing.models.opensearch_indices import OpenSearchIndices
 from opensearch_indexing.opensearch_manager import OpenSearchManager
 from utility.create_config import create_config
 
+# search strings used by several tests
+ORGANIZATION_SEARCH = 'organization'
+COMPLICATED_SEARCH = (
+    'identity restconf {\n.*base protocol;|typedef email-address {\n.*type string {|'
+    'typedef email-address {\n.*type string {\n.*pattern "'
+)
+# parsed once for the whole module, instead of in the setup of every test class
+CONFIG = create_config()
+
 
 class TestGrepSearchClass(unittest.TestCase):
     resources_path: str
     opensearch: OpenSearch
     opensearch_manager: OpenSearchManager
     opensearch_index: OpenSearchIndices
+    app_context: AppContext
+    all_module_filenames: tuple[str, ...]
 
     @classmethod
     def setUpClass(cls):
-        cls.config = create_config()
+        cls.config = CONFIG
         cls.resources_path = os.path.join(os.environ['BACKEND'], 'tests', 'resources')
         cls._configure_es(cls.config)
+        # the modules directory isn't changed by the tests, so it's listed only once for all of them
+        all_modules_directory = cls.config.get('Directory-Section', 'save-file-dir')
+        cls.all_module_filenames = tuple(sorted(os.listdir(all_modules_directory)))
+        # the cache is cleared around every test, so the application context is pushed only once for all of them
+        cls.app_context = app.app_context()
+        cls.app_context.push()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.app_context.pop()
 
     @classmethod
     def _configure_es(cls, config: ConfigParser):
@@ -34,24 +59,33 @@ class TestGrepSearchClass(unittest.TestCase):
         cls.opensearch = OpenSearch(hosts=[opensearch_host_config])
         cls.opensearch_manager = OpenSearchManager(cls.opensearch)
         cls.opensearch_index = OpenSearchIndices.TEST_SEARCH
-        with open(os.path.join(cls.resources_path, 'test_search/search_test_data.json'), 'r') as reader:
-            es_test_data = json.load(reader)
+        with open(os.path.join(cls.resources_path, 'test_search/search_test_data.json'), 'rb') as reader:
+            es_test_data = reader.read()
         index_json_name = f'initialize_{cls.opensearch_index.value}_index.json'
         index_json_path = os.path.join(os.environ['BACKEND'], 'opensearch_indexing', 'json', index_json_name)
-        with open(index_json_path, encoding='utf-8') as reader:
-            index_config = json.load(reader)
-        cls.opensearch.indices.create(index=cls.opensearch_index.value, body=index_config, ignore=400)
-        all_modules = es_test_data['all_modules']
-        for module in all_modules:
-            cls.opensearch.index(index=cls.opensearch_index.value, body=module, refresh='true')
+        with open(index_json_path, 'rb') as reader:
+            index_config = reader.read()
+        # the index is kept between the runs and rebuilt only after the test data or the index configuration changes
+        fixtures_digest = hashlib.blake2b(es_test_data + index_config, digest_size=16).hexdigest()
+        if cls._get_indexed_fixtures_digest() == fixtures_digest:
+            return
+        cls.opensearch.indices.delete(index=cls.opensearch_index.value, ignore=[400, 404])
+        cls.opensearch.indices.create(index=cls.opensearch_index.value, body=json.loads(index_config))
+        bulk(cls.opensearch, json.loads(es_test_data)['all_modules'], index=cls.opensearch_index.value)
+        cls.opensearch.indices.refresh(index=cls.opensearch_index.value)
+        # the digest is stored only after all the modules are indexed, so that an interrupted run isn't reused
+        cls.opensearch.indices.put_mapping(
+            index=cls.opensearch_index.value,
+            body={'_meta': {'fixtures_digest': fixtures_digest}},
+        )
 
     @classmethod
-    def tearDownClass(cls):
-        cls.opensearch.indices.delete(index=cls.opensearch_index.value, ignore=[400, 404])
+    def _get_indexed_fixtures_digest(cls) -> t.Optional[str]:
+        mapping = cls.opensearch.indices.get_mapping(index=cls.opensearch_index.value, ignore=404)
+        return mapping.get(cls.opensearch_index.value, {}).get('mappings', {}).get('_meta', {}).get('fixtures_digest')
 
     def setUp(self):
-        with app.app_context():
-            cache.clear()
+        cache.clear()
         self.grep_search = GrepSearch(
             config=self.config,
             opensearch_manager=self.opensearch_manager,
@@ -59,8 +93,7 @@ class TestGrepSearchClass(unittest.TestCase):
         )
 
     def tearDown(self):
-        with app.app_context():
-            cache.clear()
+        cache.clear()
 
     def test_simple_grep_search(self):
         organizations = []
@@ -70,11 +103,7 @@ class TestGrepSearchClass(unittest.TestCase):
 
     def test_complicated_grep_search(self):
         organizations = []
-        complicated_search = (
-            'identity restconf {\n.*base protocol;|typedef email-address {\n.*type string {|'
-            'typedef email-address {\n.*type string {\n.*pattern "'
-        )
-        complicated_search_result = self.grep_search.search(organizations, complicated_search)
+        complicated_search_result = self.grep_search.search(organizations, COMPLICATED_SEARCH)
         self.assertNotEqual(complicated_search_result, [])
         modules_from_complicated_search_result = [
             f'{module_data["module-name"]}@{module_data["revision"]}' for module_data in complicated_search_result
@@ -101,17 +130,12 @@ class TestGrepSearchClass(unittest.TestCase):
 
     def test_simple_inverted_grep_search(self):
         organizations = ['cisco']
-        simple_search = 'organization'
-        simple_search_result = self.grep_search.search(organizations, simple_search, inverted_search=True)
+        simple_search_result = self.grep_search.search(organizations, ORGANIZATION_SEARCH, inverted_search=True)
         self.assertEqual(simple_search_result, [])
 
     def test_complicated_inverted_grep_search(self):
         organizations = ['ietf']
-        complicated_search = (
-            'identity restconf {\n.*base protocol;|typedef email-address {\n.*type string {|'
-            'typedef email-address {\n.*type string {\n.*pattern "'
-        )
-        complicated_search_result = self.grep_search.search(organizations, complicated_search, inverted_search=True)
+        complicated_search_result = self.grep_search.search(organizations, COMPLICATED_SEARCH, inverted_search=True)
         self.assertNotEqual(complicated_search_result, [])
         modules_from_complicated_search_result = [
             f'{module_data["module-name"]}@{module_data["revision"]}' for module_data in complicated_search_result
@@ -137,7 +161,7 @@ class TestGrepSearchClass(unittest.TestCase):
             organizations=organizations,
         )
         self.assertNotEqual(search_result, [])
-        self.assertEqual(sorted(search_result), sorted(self.grep_search._get_all_modules_with_filename_extension()))
+        self.assertCountEqual(search_result, self.all_module_filenames)
 
     def test_empty_case_sensitive_grep_search(self):
         organizations = []
@@ -147,23 +171,21 @@ class TestGrepSearchClass(unittest.TestCase):
 
     def test_get_cached_results(self):
         organizations = []
-        search = 'organization'
         search_result = self.grep_search._get_matching_module_names(
-            search,
+            ORGANIZATION_SEARCH,
             inverted_search=False,
             case_sensitive=False,
             organizations=organizations,
         )
         self.assertNotEqual(search_result, [])
-        cache_key = f'{search}{False}{False}{str(sorted(organizations)) if organizations else ""}'
-        self.assertEqual(sorted(search_result), sorted(self.grep_search._search_in_cache(cache_key)))
+        cache_key = f'{ORGANIZATION_SEARCH}{False}{False}{str(sorted(organizations)) if organizations else ""}'
+        self.assertCountEqual(search_result, self.grep_search._search_in_cache(cache_key))
 
     def test_finishing_cursor(self):
         organizations = []
-        search = 'organization'
-        self.grep_search.search(organizations, search)
+        self.grep_search.search(organizations, ORGANIZATION_SEARCH)
         finishing_cursor_valid_value = min(
             self.grep_search.results_per_page,
-            len(self.grep_search._get_all_modules_with_filename_extension()),
+            len(self.all_module_filenames),
         )
         self.assertEqual(self.grep_search.finishing_cursor, finishing_cursor_valid_value)